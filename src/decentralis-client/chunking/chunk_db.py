@@ -14,8 +14,9 @@ Example:
 import sqlite3
 import logging
 import threading
+import time
 from datetime import datetime, timedelta
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 from contextlib import contextmanager
 from pathlib import Path
 
@@ -26,6 +27,10 @@ from .models import (
 from .exceptions import ChunkDatabaseError
 
 
+# Durée de validité (secondes) du cache des chunks à risque
+AT_RISK_CACHE_TTL_SECONDS = 5.0
+
+
 class ChunkDatabase:
     """
     Couche d'accès à la base de données SQLite pour le chunking.
@@ -65,6 +70,13 @@ class ChunkDatabase:
         self.conn: Optional[sqlite3.Connection] = None
         self._in_transaction = False
         self._db_lock = threading.RLock()  # Verrou pour accès concurrent thread-safe
+        # Cache (timestamp monotonic, lignes) de get_chunks_at_risk
+        self._at_risk_cache: Optional[Tuple[float, List[Dict[str, Any]]]] = None
+        # Incrémenté à chaque écriture validée dans file_metadata: permet aux vues
+        # de garder l'arborescence en cache tant que la table n'a pas changé
+        self.file_metadata_version = 0
+        # Écriture file_metadata en attente du commit de la transaction en cours
+        self._file_metadata_dirty = False
         
         try:
             # Créer le répertoire parent si nécessaire
@@ -90,6 +102,10 @@ class ChunkDatabase:
             self.conn.execute("PRAGMA journal_mode = WAL")
             self.conn.execute("PRAGMA synchronous = NORMAL")  # Balance perf/sécurité
             self.conn.execute("PRAGMA busy_timeout = 60000")  # 60 secondes de retry
+            # Lectures via mmap (256 MB), tables temporaires et cache de pages (64 MB) en mémoire
+            self.conn.execute("PRAGMA mmap_size = 268435456")
+            self.conn.execute("PRAGMA temp_store = MEMORY")
+            self.conn.execute("PRAGMA cache_size = -65536")
             
             # Créer les tables
             self._create_tables()
@@ -292,6 +308,17 @@ class ChunkDatabase:
             CREATE INDEX IF NOT EXISTS idx_replication_status 
             ON replication_history(status)
         """)
+        # Index couvrant pour get_pending_replications (filtre status + tri created_at)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_replication_pending 
+            ON replication_history(status, created_at)
+        """)
+        # Index partiel pour le GROUP BY de get_chunks_at_risk
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_locations_group 
+            ON chunk_locations(file_uuid, chunk_idx, owner_uuid, peer_uuid)
+            WHERE status = 'confirmed'
+        """)
         cursor.execute("""
             CREATE INDEX IF NOT EXISTS idx_file_metadata_owner 
             ON file_metadata(owner_uuid)
@@ -322,6 +349,9 @@ class ChunkDatabase:
                 return
             self.conn.commit()
             self._in_transaction = False
+            if self._file_metadata_dirty:
+                self._file_metadata_dirty = False
+                self.file_metadata_version += 1
             self.logger.debug("Transaction validée")
     
     def rollback(self) -> None:
@@ -332,6 +362,8 @@ class ChunkDatabase:
                 return
             self.conn.rollback()
             self._in_transaction = False
+            # Rien n'a changé dans file_metadata: le cache des vues reste valide
+            self._file_metadata_dirty = False
             self.logger.debug("Transaction annulée")
     
     @contextmanager
@@ -352,6 +384,13 @@ class ChunkDatabase:
             self.rollback()
             raise
     
+    def _file_metadata_changed(self) -> None:
+        """Signale une écriture dans file_metadata (version incrémentée une fois validée)."""
+        if self._in_transaction:
+            self._file_metadata_dirty = True
+        else:
+            self.file_metadata_version += 1
+    
     # ==========================================================================
     # FILE_METADATA
     # ==========================================================================
@@ -398,6 +437,7 @@ class ChunkDatabase:
                 ))
                 if not self._in_transaction:
                     self.conn.commit()
+                self._file_metadata_changed()
                 self.logger.debug(f"Métadonnées ajoutées: {metadata.file_uuid}")
         except sqlite3.Error as e:
             raise ChunkDatabaseError(
@@ -495,7 +535,8 @@ class ChunkDatabase:
     def get_file_metadata_by_name(
         self, 
         filename: str, 
-        owner_uuid: Optional[str] = None
+        owner_uuid: Optional[str] = None,
+        fallback_any: bool = False
     ) -> Optional[ChunkMetadata]:
         """
         Récupère les métadonnées d'un fichier par son nom.
@@ -503,13 +544,21 @@ class ChunkDatabase:
         Args:
             filename: Nom du fichier (ex: 'container.dat')
             owner_uuid: UUID du propriétaire (optionnel pour filtrer)
+            fallback_any: Si aucun fichier de ce propriétaire, accepter celui
+                d'un autre propriétaire (une seule requête, propriétaire en tête)
             
         Returns:
             ChunkMetadata ou None si non trouvé
         """
         cursor = self.conn.cursor()
         
-        if owner_uuid:
+        if owner_uuid and fallback_any:
+            cursor.execute("""
+                SELECT file_uuid FROM file_metadata 
+                WHERE original_filename = ?
+                ORDER BY (owner_uuid = ?) DESC, created_at DESC LIMIT 1
+            """, (filename, owner_uuid))
+        elif owner_uuid:
             cursor.execute("""
                 SELECT file_uuid FROM file_metadata 
                 WHERE original_filename = ? AND owner_uuid = ?
@@ -690,6 +739,8 @@ class ChunkDatabase:
             
             if not self._in_transaction:
                 self.conn.commit()
+            self._file_metadata_changed()
+            self._invalidate_at_risk_cache()
             self.logger.debug(f"Fichier et chunks supprimés: {file_uuid}")
     
     def get_file_by_uuid(self, file_uuid: str, owner_uuid: str) -> Optional[ChunkMetadata]:
@@ -751,6 +802,7 @@ class ChunkDatabase:
                 ))
                 if not self._in_transaction:
                     self.conn.commit()
+                self._file_metadata_changed()
         except sqlite3.Error as e:
             raise ChunkDatabaseError(
                 "Failed to update file metadata",
@@ -955,6 +1007,7 @@ class ChunkDatabase:
             
             if not self._in_transaction:
                 self.conn.commit()
+            self._invalidate_at_risk_cache()
             self.logger.debug(f"Chunk supprimé: {file_uuid}#{chunk_idx}")
     
     def get_expired_chunks(self) -> List[StoredChunk]:
@@ -991,6 +1044,56 @@ class ChunkDatabase:
             self.logger.info(f"Chunks expirés nettoyés: {count}")
             return count
     
+    def delete_expired_chunks(self) -> List[Tuple[str, str, int]]:
+        """
+        Supprime en une seule requête tous les chunks expirés.
+        
+        Contrairement à cleanup_expired_chunks, retourne les chunks supprimés
+        pour permettre d'effacer les fichiers correspondants sur disque.
+        
+        Returns:
+            Liste de tuples (owner_uuid, file_uuid, chunk_idx) supprimés
+            
+        Raises:
+            ChunkDatabaseError: Si la suppression échoue
+        """
+        try:
+            with self._db_lock:
+                cursor = self.conn.cursor()
+                now = datetime.utcnow().isoformat()
+                
+                if sqlite3.sqlite_version_info >= (3, 35, 0):
+                    cursor.execute("""
+                        DELETE FROM chunks WHERE expires_at < ?
+                        RETURNING owner_uuid, file_uuid, chunk_idx
+                    """, (now,))
+                    rows = cursor.fetchall()
+                else:
+                    # SQLite < 3.35: pas de RETURNING, lecture puis suppression sous verrou
+                    cursor.execute("""
+                        SELECT owner_uuid, file_uuid, chunk_idx FROM chunks WHERE expires_at < ?
+                    """, (now,))
+                    rows = cursor.fetchall()
+                    cursor.execute("""
+                        DELETE FROM chunks WHERE expires_at < ?
+                    """, (now,))
+                
+                deleted = [(row[0], row[1], row[2]) for row in rows]
+                if deleted:
+                    self.decrement_foreign_chunks_counter(len(deleted))
+                
+                if not self._in_transaction:
+                    self.conn.commit()
+                self._invalidate_at_risk_cache()
+                self.logger.info(f"Chunks expirés supprimés: {len(deleted)}")
+                return deleted
+        except sqlite3.Error as e:
+            raise ChunkDatabaseError(
+                "Failed to delete expired chunks",
+                {},
+                sqlite_error=str(e)
+            )
+    
     def update_last_accessed(self, file_uuid: str, chunk_idx: int, owner_uuid: str) -> None:
         """
         Met à jour la date de dernier accès d'un chunk.
@@ -1045,6 +1148,7 @@ class ChunkDatabase:
                 ))
                 if not self._in_transaction:
                     self.conn.commit()
+                self._invalidate_at_risk_cache()
                 return cursor.lastrowid
         except sqlite3.IntegrityError:
             # La localisation existe déjà, on met à jour
@@ -1166,6 +1270,7 @@ class ChunkDatabase:
             """, (status, failure_reason, file_uuid, chunk_idx, owner_uuid, peer_uuid))
             if not self._in_transaction:
                 self.conn.commit()
+            self._invalidate_at_risk_cache()
     
     def confirm_location(self, file_uuid: str, chunk_idx: int,
                         owner_uuid: str, peer_uuid: str) -> None:
@@ -1188,6 +1293,7 @@ class ChunkDatabase:
             """, (now, file_uuid, chunk_idx, owner_uuid, peer_uuid))
             if not self._in_transaction:
                 self.conn.commit()
+            self._invalidate_at_risk_cache()
     
     def get_pending_locations(self) -> List[ChunkAssignment]:
         """
@@ -1222,6 +1328,64 @@ class ChunkDatabase:
             """, (file_uuid, chunk_idx, owner_uuid, peer_uuid))
             if not self._in_transaction:
                 self.conn.commit()
+            self._invalidate_at_risk_cache()
+    
+    # ==========================================================================
+    # CHUNKS À RISQUE
+    # ==========================================================================
+    
+    def get_chunks_at_risk(self) -> List[Dict[str, Any]]:
+        """
+        Identifie les chunks qui risquent de devenir indisponibles.
+        
+        Un chunk est à risque s'il n'a qu'une seule copie confirmée ou si
+        un des peers qui le stockent a un score de fiabilité faible.
+        
+        Le résultat de l'agrégation est mis en cache pendant
+        AT_RISK_CACHE_TTL_SECONDS et invalidé dès qu'une localisation,
+        un chunk ou un score de fiabilité est modifié.
+        
+        Returns:
+            Liste de dictionnaires avec les infos des chunks à risque
+        """
+        with self._db_lock:
+            cached = self._at_risk_cache
+            if cached is not None and time.monotonic() - cached[0] < AT_RISK_CACHE_TTL_SECONDS:
+                return list(cached[1])
+            
+            cursor = self.conn.cursor()
+            cursor.execute("""
+                SELECT 
+                    cl.file_uuid,
+                    cl.chunk_idx,
+                    cl.owner_uuid,
+                    COUNT(*) as replica_count,
+                    MIN(p.reliability_score) as min_reliability
+                FROM chunk_locations cl
+                LEFT JOIN peers p ON cl.peer_uuid = p.uuid
+                WHERE cl.status = 'confirmed'
+                GROUP BY cl.file_uuid, cl.chunk_idx, cl.owner_uuid
+                HAVING replica_count <= 1 OR min_reliability < 0.5
+            """)
+            
+            at_risk = [
+                {
+                    'file_uuid': row['file_uuid'],
+                    'chunk_idx': row['chunk_idx'],
+                    'owner_uuid': row['owner_uuid'],
+                    'replica_count': row['replica_count'],
+                    'min_reliability': row['min_reliability'],
+                    'risk_level': 'high' if row['replica_count'] <= 1 else 'medium',
+                }
+                for row in cursor.fetchall()
+            ]
+            
+            self._at_risk_cache = (time.monotonic(), at_risk)
+            return list(at_risk)
+    
+    def _invalidate_at_risk_cache(self) -> None:
+        """Invalide le cache des chunks à risque."""
+        self._at_risk_cache = None
     
     # ==========================================================================
     # REPLICATION_HISTORY
@@ -1357,26 +1521,27 @@ class ChunkDatabase:
             ip_address: Adresse IP
             port: Port
         """
-        cursor = self.conn.cursor()
-        now = datetime.utcnow().isoformat()
-        
-        # Vérifier si le peer existe
-        cursor.execute("SELECT uuid FROM peers WHERE uuid = ?", (uuid,))
-        if cursor.fetchone():
-            # Mise à jour
-            cursor.execute("""
-                UPDATE peers SET ip_address = ?, port = ?, last_seen = ?, is_online = 1
-                WHERE uuid = ?
-            """, (ip_address, port, now, uuid))
-        else:
-            # Insertion
-            cursor.execute("""
-                INSERT INTO peers (uuid, ip_address, port, first_seen, last_seen, is_online)
-                VALUES (?, ?, ?, ?, ?, 1)
-            """, (uuid, ip_address, port, now, now))
-        
-        if not self._in_transaction:
-            self.conn.commit()
+        with self._db_lock:
+            cursor = self.conn.cursor()
+            now = datetime.utcnow().isoformat()
+            
+            # Vérifier si le peer existe
+            cursor.execute("SELECT uuid FROM peers WHERE uuid = ?", (uuid,))
+            if cursor.fetchone():
+                # Mise à jour
+                cursor.execute("""
+                    UPDATE peers SET ip_address = ?, port = ?, last_seen = ?, is_online = 1
+                    WHERE uuid = ?
+                """, (ip_address, port, now, uuid))
+            else:
+                # Insertion
+                cursor.execute("""
+                    INSERT INTO peers (uuid, ip_address, port, first_seen, last_seen, is_online)
+                    VALUES (?, ?, ?, ?, ?, 1)
+                """, (uuid, ip_address, port, now, now))
+            
+            if not self._in_transaction:
+                self.conn.commit()
     
     def get_peer(self, uuid: str) -> Optional[Dict[str, Any]]:
         """
@@ -1422,12 +1587,59 @@ class ChunkDatabase:
             score: Nouveau score (0.0 - 1.0)
         """
         score = max(0.0, min(1.0, score))  # Clamp entre 0 et 1
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            UPDATE peers SET reliability_score = ? WHERE uuid = ?
-        """, (score, uuid))
-        if not self._in_transaction:
-            self.conn.commit()
+        with self._db_lock:
+            cursor = self.conn.cursor()
+            cursor.execute("""
+                UPDATE peers SET reliability_score = ? WHERE uuid = ?
+            """, (score, uuid))
+            if not self._in_transaction:
+                self.conn.commit()
+            self._invalidate_at_risk_cache()
+    
+    def apply_uptime_bonus(self, uptime_bonus: float,
+                           max_bonus: float = 0.3,
+                           min_delta: float = 0.01) -> List[Dict[str, Any]]:
+        """
+        Applique le bonus d'uptime à tous les peers en ligne en une requête.
+        
+        Pour chaque peer: bonus = min(uptime_bonus * jours_en_ligne, max_bonus),
+        score = min(1.0, score + bonus), mis à jour seulement si la variation
+        dépasse min_delta.
+        
+        Args:
+            uptime_bonus: Bonus par jour de présence
+            max_bonus: Bonus maximum
+            min_delta: Variation minimale pour mettre à jour
+            
+        Returns:
+            Peers en ligne dont first_seen n'est pas interprétable par SQLite
+            (à traiter côté Python)
+        """
+        with self._db_lock:
+            cursor = self.conn.cursor()
+            cursor.execute("""
+                UPDATE peers
+                SET reliability_score = MAX(0.0, MIN(1.0, reliability_score + MIN(
+                    ? * CAST(julianday('now') - julianday(first_seen) AS INTEGER), ?
+                )))
+                WHERE is_online = 1
+                  AND julianday(first_seen) IS NOT NULL
+                  AND ABS(MIN(1.0, reliability_score + MIN(
+                      ? * CAST(julianday('now') - julianday(first_seen) AS INTEGER), ?
+                  )) - reliability_score) > ?
+            """, (uptime_bonus, max_bonus, uptime_bonus, max_bonus, min_delta))
+            updated = cursor.rowcount
+            if not self._in_transaction:
+                self.conn.commit()
+            if updated:
+                self._invalidate_at_risk_cache()
+            
+            cursor.execute("""
+                SELECT * FROM peers
+                WHERE is_online = 1 AND first_seen IS NOT NULL
+                  AND julianday(first_seen) IS NULL
+            """)
+            return [dict(row) for row in cursor.fetchall()]
     
     def update_peer_chunks_count(self, uuid: str, count: int) -> None:
         """
@@ -1437,12 +1649,13 @@ class ChunkDatabase:
             uuid: UUID du peer
             count: Nouveau nombre de chunks
         """
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            UPDATE peers SET chunks_stored = ? WHERE uuid = ?
-        """, (count, uuid))
-        if not self._in_transaction:
-            self.conn.commit()
+        with self._db_lock:
+            cursor = self.conn.cursor()
+            cursor.execute("""
+                UPDATE peers SET chunks_stored = ? WHERE uuid = ?
+            """, (count, uuid))
+            if not self._in_transaction:
+                self.conn.commit()
     
     def get_online_peers(self) -> List[Dict[str, Any]]:
         """
@@ -1459,6 +1672,19 @@ class ChunkDatabase:
         
         return [dict(row) for row in cursor.fetchall()]
     
+    def has_online_peers(self) -> bool:
+        """
+        Indique si au moins un peer est en ligne.
+        
+        Returns:
+            True si un peer est marqué en ligne
+        """
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            SELECT EXISTS(SELECT 1 FROM peers WHERE is_online = 1 LIMIT 1)
+        """)
+        return bool(cursor.fetchone()[0])
+    
     def set_peer_offline(self, uuid: str) -> None:
         """
         Marque un peer comme hors ligne.
@@ -1466,12 +1692,13 @@ class ChunkDatabase:
         Args:
             uuid: UUID du peer
         """
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            UPDATE peers SET is_online = 0 WHERE uuid = ?
-        """, (uuid,))
-        if not self._in_transaction:
-            self.conn.commit()
+        with self._db_lock:
+            cursor = self.conn.cursor()
+            cursor.execute("""
+                UPDATE peers SET is_online = 0 WHERE uuid = ?
+            """, (uuid,))
+            if not self._in_transaction:
+                self.conn.commit()
         self.logger.info(f"Peer marqué hors ligne: {uuid}")
     
     def get_peer_stats(self) -> Dict[str, Any]:
@@ -28,6 +28,7 @@ import json
 import asyncio
 import logging
 import base64
+import binascii
 import hashlib
 import traceback
 from datetime import datetime, timedelta
@@ -42,6 +43,7 @@ from .exceptions import (
 from .models import StoredChunk, compute_chunk_hash
 from .chunk_store import ChunkStore
 from .chunk_db import ChunkDatabase
+from .peer_rpc import tune_stream_socket, dumps_message, loads_message, LENGTH_PREFIX
 
 
 class ChunkNetworkServer:
@@ -222,6 +224,7 @@ class ChunkNetworkServer:
         """
         addr = writer.get_extra_info('peername')
         self.logger.info(f"[SERVER] Nouvelle connexion entrante depuis {addr}")
+        tune_stream_socket(writer, self.config.get('SOCKET_BUFFER_SIZE', 1024 * 1024))
         
         # Créer une tâche pour cette connexion
         task = asyncio.current_task()
@@ -236,7 +239,7 @@ class ChunkNetworkServer:
                         reader.readexactly(4),
                         timeout=self.config['RPC_TIMEOUT_SECONDS']
                     )
-                    message_length = int.from_bytes(length_bytes, 'big')
+                    (message_length,) = LENGTH_PREFIX.unpack(length_bytes)
                     self.logger.debug(f"[SERVER] Message de {message_length} bytes attendu de {addr}")
                     
                     # Vérifier la taille max
@@ -264,8 +267,9 @@ class ChunkNetworkServer:
                         timeout=adaptive_timeout
                     )
                     
-                    # Parser la requête
-                    request = json.loads(message_bytes.decode('utf-8'))
+                    # Parser la requête directement depuis les bytes reçus
+                    # (pas de copie intermédiaire en str du message)
+                    request = loads_message(message_bytes)
                     method = request.get('method', 'unknown')
                     self.logger.info(f"[SERVER] Requête reçue de {addr}: method={method}")
                     
@@ -274,10 +278,11 @@ class ChunkNetworkServer:
                     self.logger.debug(f"[SERVER] Réponse: {str(response)[:200]}...")
                     
                     # Envoyer la réponse
-                    response_bytes = json.dumps(response).encode('utf-8')
-                    length_prefix = len(response_bytes).to_bytes(4, 'big')
+                    response_bytes = dumps_message(response)
+                    length_prefix = LENGTH_PREFIX.pack(len(response_bytes))
                     
-                    writer.write(length_prefix + response_bytes)
+                    # Préfixe et corps en un seul envoi, sans les concaténer
+                    writer.writelines((length_prefix, response_bytes))
                     await writer.drain()
                     self.logger.info(f"[SERVER] Réponse envoyée à {addr} ({len(response_bytes)} bytes)")
                     
@@ -322,9 +327,9 @@ class ChunkNetworkServer:
             writer: StreamWriter
             response: Réponse à envoyer
         """
-        response_bytes = json.dumps(response).encode('utf-8')
-        length_prefix = len(response_bytes).to_bytes(4, 'big')
-        writer.write(length_prefix + response_bytes)
+        response_bytes = dumps_message(response)
+        length_prefix = LENGTH_PREFIX.pack(len(response_bytes))
+        writer.writelines((length_prefix, response_bytes))
         await writer.drain()
     
     # ==========================================================================
@@ -465,11 +470,12 @@ class ChunkNetworkServer:
         owner_uuid = params['owner_uuid']
         
         self.logger.info(f"[HANDLER] >>> Stockage: {file_uuid}#{chunk_idx} du propriétaire {owner_uuid[:16]}")
-        chunk_data = base64.b64decode(params['chunk_data_b64'])
+        chunk_data = binascii.a2b_base64(params['chunk_data_b64'])
         content_hash = params['content_hash']
         
-        # Vérifier le hash
-        computed_hash = compute_chunk_hash(chunk_data)
+        # Vérifier le hash (hors de la boucle: hashlib libère le GIL et les
+        # autres connexions continuent d'être servies)
+        computed_hash = await asyncio.to_thread(compute_chunk_hash, chunk_data)
         if computed_hash != content_hash:
             raise ChunkValidationError(
                 f"Hash mismatch: expected {content_hash}, got {computed_hash}",
@@ -502,9 +508,7 @@ class ChunkNetworkServer:
                 expires_at=expires_at,
             )
             try:
-                self.chunk_db.add_chunk(stored_chunk)
-                # Incrémenter le compteur de chunks étrangers
-                self.chunk_db.increment_foreign_chunks_counter(1)
+                await asyncio.to_thread(self._record_stored_chunk, stored_chunk)
                 
                 # Appeler le callback si disponible pour mettre à jour l'UI
                 if self.on_chunk_stored:
@@ -526,6 +530,12 @@ class ChunkNetworkServer:
             'expires_at': expires_at.isoformat(),
         }
     
+    def _record_stored_chunk(self, stored_chunk: StoredChunk) -> None:
+        """Enregistre un chunk reçu en BD (exécuté dans un thread, hors de la boucle)."""
+        self.chunk_db.add_chunk(stored_chunk)
+        # Incrémenter le compteur de chunks étrangers
+        self.chunk_db.increment_foreign_chunks_counter(1)
+    
     async def _handle_get_chunk(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """
         Handler pour récupérer un chunk.
@@ -563,7 +573,7 @@ class ChunkNetworkServer:
                 chunk_idx=chunk_idx
             )
         
-        content_hash = compute_chunk_hash(chunk_data)
+        content_hash = await asyncio.to_thread(compute_chunk_hash, chunk_data)
         chunk_b64 = base64.b64encode(chunk_data).decode('ascii')
         
         return {
@@ -778,7 +788,8 @@ class ChunkNetworkServer:
         # Stocker l'annonce dans la base de données locale
         # pour une recherche ultérieure par d'autres peers
         try:
-            self.chunk_db.store_file_announcement(
+            await asyncio.to_thread(
+                self.chunk_db.store_file_announcement,
                 file_uuid, owner_uuid, metadata_json
             )
             return {'success': True, 'indexed': True}
@@ -808,11 +819,15 @@ class ChunkNetworkServer:
         
         # Rechercher dans la base locale
         try:
-            metadata = self.chunk_db.get_file_metadata(file_uuid, owner_uuid)
+            metadata = await asyncio.to_thread(
+                self.chunk_db.get_file_metadata, file_uuid, owner_uuid
+            )
             
             if metadata:
                 # Récupérer les localisations des chunks
-                chunk_locations = self.chunk_db.get_chunk_locations(file_uuid)
+                chunk_locations = await asyncio.to_thread(
+                    self.chunk_db.get_chunk_locations, file_uuid
+                )
                 
                 return {
                     'found': True,
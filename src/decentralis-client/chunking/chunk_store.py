@@ -250,9 +250,7 @@ class ChunkStore:
             f"{chunk_idx}.chunk"
         )
         
-        if not os.path.exists(chunk_path):
-            return None
-        
+        # EAFP: une seule ouverture plutôt qu'un stat() suivi d'un open()
         try:
             with open(chunk_path, 'rb') as f:
                 data = f.read()
@@ -263,6 +261,8 @@ class ChunkStore:
             )
             return data
             
+        except FileNotFoundError:
+            return None
         except IOError as e:
             self.logger.error(f"Erreur lecture chunk {chunk_path}: {e}")
             return None
@@ -283,14 +283,13 @@ class ChunkStore:
             "metadata.json"
         )
         
-        if not os.path.exists(metadata_path):
-            return None
-        
         try:
             with open(metadata_path, 'r', encoding='utf-8') as f:
                 json_str = f.read()
             return ChunkMetadata.from_json(json_str)
             
+        except FileNotFoundError:
+            return None
         except (IOError, json.JSONDecodeError) as e:
             self.logger.error(f"Erreur lecture métadonnées {metadata_path}: {e}")
             return None
@@ -370,13 +369,12 @@ class ChunkStore:
             f"{chunk_idx}.chunk"
         )
         
-        if not os.path.exists(chunk_path):
-            return False
-        
         try:
             os.remove(chunk_path)
             self.logger.debug(f"Chunk supprimé: {chunk_path}")
             return True
+        except FileNotFoundError:
+            return False
         except OSError as e:
             self.logger.error(f"Erreur suppression chunk {chunk_path}: {e}")
             return False
@@ -774,9 +772,6 @@ class ChunkStore:
             f"{chunk_idx}.chunk"
         )
         
-        if not os.path.exists(chunk_path):
-            return 0
-        
         try:
             return os.path.getsize(chunk_path)
         except OSError:
@@ -18,10 +18,12 @@ Example:
 """
 
 import os
+import mmap
 import uuid
 import hashlib
 import logging
 import asyncio
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Optional, List, Dict, Any, Callable
@@ -43,6 +45,31 @@ from .chunk_net import ChunkNetworkServer
 from .peer_rpc import PeerRPC
 
 
+# Au-delà de cette taille, le conteneur est projeté en mémoire (mmap) au lieu
+# d'être copié en entier dans un bytes avant le hachage et l'encodage
+MMAP_READ_THRESHOLD = 16 * 1024 * 1024
+
+
+@contextmanager
+def _open_file_data(file_path: str):
+    """
+    Fournit le contenu d'un fichier sous forme indexable (bytes ou mmap).
+
+    Les gros fichiers sont projetés en lecture seule: les tranches prises par
+    l'encodeur sont lues directement depuis le cache de pages, sans copie
+    intermédiaire du fichier complet.
+    """
+    with open(file_path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < MMAP_READ_THRESHOLD:
+            yield f.read()
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if hasattr(mm, 'madvise') and hasattr(mmap, 'MADV_SEQUENTIAL'):
+                mm.madvise(mmap.MADV_SEQUENTIAL)
+            yield mm
+
+
 class ChunkingManager:
     """
     Orchestrateur principal du système de chunking P2P.
@@ -238,30 +265,28 @@ class ChunkingManager:
         self.logger.info(f"Début du chunking: {file_path} pour {owner_uuid}")
         
         try:
-            # Lire le fichier
-            with open(file_path, 'rb') as f:
-                file_data = f.read()
-            
-            original_size = len(file_data)
-            original_hash = hashlib.sha256(file_data).hexdigest()
-            original_filename = os.path.basename(file_path)
-            
-            # Utiliser le chemin logique fourni ou générer depuis le basename
-            if file_logical_path is None:
-                file_logical_path = original_filename
-            
-            self.logger.debug(
-                f"Fichier lu: {original_size} bytes, hash={original_hash[:16]}..."
-            )
-            
-            # Générer un UUID unique pour ce fichier
-            file_uuid = str(uuid.uuid4())
-            
-            # Calculer la taille optimale des chunks
-            chunk_size = calculate_optimal_chunk_size(original_size)
-            
-            # Encoder avec Reed-Solomon
-            data_chunks, parity_chunks = self.encoder.encode_data(file_data)
+            # Lire le fichier (projeté en mémoire au-delà de MMAP_READ_THRESHOLD)
+            with _open_file_data(file_path) as file_data:
+                original_size = len(file_data)
+                original_hash = hashlib.sha256(file_data).hexdigest()
+                original_filename = os.path.basename(file_path)
+
+                # Utiliser le chemin logique fourni ou générer depuis le basename
+                if file_logical_path is None:
+                    file_logical_path = original_filename
+
+                self.logger.debug(
+                    f"Fichier lu: {original_size} bytes, hash={original_hash[:16]}..."
+                )
+
+                # Générer un UUID unique pour ce fichier
+                file_uuid = str(uuid.uuid4())
+
+                # Calculer la taille optimale des chunks
+                chunk_size = calculate_optimal_chunk_size(original_size)
+
+                # Encoder avec Reed-Solomon
+                data_chunks, parity_chunks = self.encoder.encode_data(file_data)
             
             self.logger.debug(
                 f"Encodage RS terminé: {len(data_chunks)} data + "
@@ -528,93 +553,105 @@ class ChunkingManager:
 
             self.logger.info(f">>> Assignments créés: {len(assignments)}")
 
-            # Distribuer les chunks
-            distributed = 0
-            failed = 0
-            local_deleted = 0
-            results = []
+            # Distribuer les chunks: envois concurrents (au plus
+            # MAX_CONCURRENT_TRANSFERS en vol), la latence totale n'est plus la
+            # somme des allers-retours de chaque chunk
+            max_transfers = self.config.get('LIMITS', {}).get('MAX_CONCURRENT_TRANSFERS', 5)
+            semaphore = asyncio.Semaphore(max(1, max_transfers))
 
             self.logger.info(f"Début distribution de {len(assignments)} chunks...")
 
-            for i, assignment in enumerate(assignments):
-                self.logger.info(
-                    f"[{i+1}/{len(assignments)}] Traitement chunk {assignment.chunk_idx} "
-                    f"vers {assignment.peer_uuid}..."
-                )
-                try:
-                    # Récupérer les données du chunk
-                    chunk_data = self.store.get_chunk(
-                        owner_uuid, file_uuid, assignment.chunk_idx
+            async def distribute_one(i: int, assignment: ChunkAssignment):
+                """Envoie un chunk; retourne (succès, chunk local supprimé, assignation)."""
+                async with semaphore:
+                    self.logger.info(
+                        f"[{i+1}/{len(assignments)}] Traitement chunk {assignment.chunk_idx} "
+                        f"vers {assignment.peer_uuid}..."
                     )
-
-                    if chunk_data is None:
-                        self.logger.error(
-                            f"Chunk non trouvé localement: {file_uuid}#{assignment.chunk_idx}"
+                    try:
+                        # Récupérer les données du chunk (lecture disque hors de
+                        # la boucle: les envois concurrents ne s'attendent pas)
+                        chunk_data = await asyncio.to_thread(
+                            self.store.get_chunk,
+                            owner_uuid, file_uuid, assignment.chunk_idx
                         )
-                        assignment.mark_failed("Chunk not found locally")
-                        failed += 1
-                        continue
 
-                    self.logger.info(
-                        f"  Chunk {assignment.chunk_idx} lu ({len(chunk_data)} bytes), "
-                        f"envoi vers {assignment.peer_uuid}..."
-                    )
+                        if chunk_data is None:
+                            self.logger.error(
+                                f"Chunk non trouvé localement: {file_uuid}#{assignment.chunk_idx}"
+                            )
+                            assignment.mark_failed("Chunk not found locally")
+                            return False, False, None
 
-                    # Envoyer au peer
-                    success = await self._send_chunk_to_peer(
-                        assignment.peer_uuid,
-                        file_uuid,
-                        assignment.chunk_idx,
-                        owner_uuid,
-                        chunk_data,
-                        metadata.chunk_hashes.get(assignment.chunk_idx, '')
-                    )
+                        self.logger.info(
+                            f"  Chunk {assignment.chunk_idx} lu ({len(chunk_data)} bytes), "
+                            f"envoi vers {assignment.peer_uuid}..."
+                        )
 
-                    self.logger.info(f"  Résultat envoi chunk {assignment.chunk_idx}: {success}")
+                        # Envoyer au peer
+                        success = await self._send_chunk_to_peer(
+                            assignment.peer_uuid,
+                            file_uuid,
+                            assignment.chunk_idx,
+                            owner_uuid,
+                            chunk_data,
+                            metadata.chunk_hashes.get(assignment.chunk_idx, '')
+                        )
 
-                    if success:
-                        assignment.mark_confirmed()
-                        distributed += 1
+                        self.logger.info(f"  Résultat envoi chunk {assignment.chunk_idx}: {success}")
 
-                        # Supprimer le chunk local après confirmation du peer distant
-                        # Le peer distant a validé le checksum et confirmé le stockage
-                        if delete_local_after_confirm:
-                            try:
-                                # Supprimer du disque
-                                deleted = self.store.delete_chunk(
-                                    owner_uuid, file_uuid, assignment.chunk_idx
-                                )
-                                if deleted:
-                                    # Supprimer aussi de la base de données
-                                    self.db.delete_chunk(
-                                        file_uuid, assignment.chunk_idx, owner_uuid
+                        deleted_local = False
+                        if success:
+                            assignment.mark_confirmed()
+
+                            # Supprimer le chunk local après confirmation du peer distant
+                            # Le peer distant a validé le checksum et confirmé le stockage
+                            if delete_local_after_confirm:
+                                try:
+                                    # Supprimer du disque
+                                    deleted = await asyncio.to_thread(
+                                        self.store.delete_chunk,
+                                        owner_uuid, file_uuid, assignment.chunk_idx
                                     )
-                                    local_deleted += 1
-                                    self.logger.info(
-                                        f"Chunk local supprimé après confirmation: "
-                                        f"{file_uuid}#{assignment.chunk_idx}"
+                                    if deleted:
+                                        # Supprimer aussi de la base de données
+                                        await asyncio.to_thread(
+                                            self.db.delete_chunk,
+                                            file_uuid, assignment.chunk_idx, owner_uuid
+                                        )
+                                        deleted_local = True
+                                        self.logger.info(
+                                            f"Chunk local supprimé après confirmation: "
+                                            f"{file_uuid}#{assignment.chunk_idx}"
+                                        )
+                                except Exception as del_err:
+                                    self.logger.warning(
+                                        f"Erreur suppression chunk local {assignment.chunk_idx}: "
+                                        f"{del_err}"
                                     )
-                            except Exception as del_err:
-                                self.logger.warning(
-                                    f"Erreur suppression chunk local {assignment.chunk_idx}: "
-                                    f"{del_err}"
-                                )
-                    else:
-                        assignment.mark_failed("Transfer failed")
-                        failed += 1
+                        else:
+                            assignment.mark_failed("Transfer failed")
 
-                    # Enregistrer l'assignation
-                    self.db.add_location(assignment)
-                    results.append(assignment.to_dict())
+                        # Enregistrer l'assignation
+                        await asyncio.to_thread(self.db.add_location, assignment)
+                        return success, deleted_local, assignment.to_dict()
 
-                except Exception as e:
-                    self.logger.error(
-                        f"Erreur distribution chunk {assignment.chunk_idx}: {e}"
-                    )
-                    assignment.mark_failed(str(e))
-                    failed += 1
-                    self.db.add_location(assignment)
-                    results.append(assignment.to_dict())
+                    except Exception as e:
+                        self.logger.error(
+                            f"Erreur distribution chunk {assignment.chunk_idx}: {e}"
+                        )
+                        assignment.mark_failed(str(e))
+                        await asyncio.to_thread(self.db.add_location, assignment)
+                        return False, False, assignment.to_dict()
+
+            outcomes = await asyncio.gather(
+                *(distribute_one(i, a) for i, a in enumerate(assignments))
+            )
+
+            distributed = sum(1 for success, _, _ in outcomes if success)
+            failed = len(outcomes) - distributed
+            local_deleted = sum(1 for _, deleted, _ in outcomes if deleted)
+            results = [entry for _, _, entry in outcomes if entry is not None]
 
             self.logger.info(
                 f"Distribution terminée: {distributed}/{len(assignments)} réussis, "
@@ -979,8 +1016,12 @@ class ChunkingManager:
         # 6. Écrire sur disque si demandé
         if output_path:
             output_path = os.path.abspath(output_path)
-            with open(output_path, 'wb') as f:
+            # Écriture dans un fichier voisin puis renommage atomique: un
+            # container partiellement écrit n'est jamais visible sous son nom
+            tmp_path = output_path + '.tmp'
+            with open(tmp_path, 'wb') as f:
                 f.write(reconstructed)
+            os.replace(tmp_path, output_path)
             self.logger.info(f"Fichier écrit: {output_path}")
         
         return reconstructed
@@ -200,6 +200,7 @@ _MAX_REPLICATION_RETRIES = _get_env_int('DECENTRALIS_MAX_REPLICATION_RETRIES', 3
 _RPC_TIMEOUT_SECONDS = _get_env_int('DECENTRALIS_RPC_TIMEOUT', 30)
 _RPC_MAX_CONNECTIONS = _get_env_int('DECENTRALIS_RPC_MAX_CONNECTIONS', 10)
 _CHUNK_TRANSFER_BUFFER_SIZE = _get_env_int('DECENTRALIS_TRANSFER_BUFFER', 65536)
+_SOCKET_BUFFER_SIZE = _get_env_int('DECENTRALIS_SOCKET_BUFFER', 1024 * 1024)
 
 
 # Configuration complète exportée
@@ -258,6 +259,7 @@ CHUNKING_CONFIG: Dict[str, Any] = {
         'RPC_TIMEOUT_SECONDS': _RPC_TIMEOUT_SECONDS,
         'MAX_CONNECTIONS': _RPC_MAX_CONNECTIONS,
         'TRANSFER_BUFFER_SIZE': _CHUNK_TRANSFER_BUFFER_SIZE,
+        'SOCKET_BUFFER_SIZE': _SOCKET_BUFFER_SIZE,  # SO_SNDBUF/SO_RCVBUF des sockets P2P
         'KEEPALIVE_INTERVAL_SECONDS': 30,
         'CONNECTION_RETRY_DELAY_SECONDS': 5,
         'MAX_CONNECTION_RETRIES': 3,
@@ -30,10 +30,13 @@ Example:
 """
 
 import json
+import socket
+import struct
 import asyncio
 import logging
 import hashlib
 import base64
+import binascii
 import uuid as uuid_module
 from datetime import datetime
 from typing import Optional, Dict, Any, Tuple
@@ -43,6 +46,27 @@ from .config import CHUNKING_CONFIG
 from .exceptions import PeerCommunicationError
 from .models import compute_chunk_hash
 
+# orjson (optionnel) sérialise/parse directement en bytes, plusieurs fois plus
+# vite que json sur les gros messages (chunks en base64). Le format échangé
+# reste du JSON: les peers sans orjson restent compatibles.
+try:
+    import orjson
+
+    def dumps_message(payload: Dict[str, Any]) -> bytes:
+        return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+
+    def loads_message(data: bytes) -> Dict[str, Any]:
+        return orjson.loads(data)
+except ImportError:
+    def dumps_message(payload: Dict[str, Any]) -> bytes:
+        return json.dumps(payload).encode('utf-8')
+
+    def loads_message(data: bytes) -> Dict[str, Any]:
+        return json.loads(data)
+
+# Préfixe de longueur des messages: entier non signé 32 bits big-endian
+LENGTH_PREFIX = struct.Struct('>I')
+
 # Constantes pour le retry avec backoff exponentiel
 DEFAULT_MAX_RETRIES = 3
 DEFAULT_RETRY_DELAY = 5  # secondes
@@ -76,6 +100,30 @@ def calculate_adaptive_timeout(data_size_bytes: int, base_timeout: int = 30) ->
     return max(int(adaptive_timeout), MIN_TIMEOUT_SECONDS)
 
 
+def tune_stream_socket(writer: asyncio.StreamWriter, buffer_size: int) -> None:
+    """
+    Règle le socket TCP d'une connexion P2P pour les transferts de chunks.
+
+    Désactive Nagle (pas d'attente de l'ACK retardé entre deux messages),
+    agrandit les tampons noyau d'émission/réception et aligne le seuil de
+    drain() du transport sur cette taille pour garder le lien plein.
+
+    Args:
+        writer: StreamWriter de la connexion
+        buffer_size: Taille des tampons en bytes
+    """
+    sock = writer.get_extra_info('socket')
+    if sock is None:
+        return
+    try:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, buffer_size)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, buffer_size)
+    except OSError:
+        pass  # Option refusée par l'OS: garder les valeurs par défaut
+    writer.transport.set_write_buffer_limits(high=buffer_size)
+
+
 @dataclass
 class PeerConnection:
     """
@@ -229,127 +277,132 @@ class PeerRPC:
         Raises:
             PeerCommunicationError: Si la connexion échoue après tous les retries
         """
-        lock = self._get_lock()
-        async with lock:
-            # DÉSACTIVER la réutilisation de connexion pour éviter les conflits de concurrence
-            # Le bug "readexactly() called while another coroutine is already waiting"
-            # se produit quand plusieurs envois simultanés réutilisent la même connexion
-            
-            # Toujours créer une nouvelle connexion
-            # if peer_uuid in self._connections:
-            #     conn = self._connections[peer_uuid]
-            #     if conn.is_connected:
-            #         conn.last_used = datetime.utcnow()
-            #         return conn
-
-            # Résoudre l'adresse si nécessaire
-            if ip_address is None or port is None:
-                resolved_address = await self._resolve_peer_with_fallback(peer_uuid)
-                if resolved_address:
-                    ip_address, port = resolved_address
-                else:
-                    raise PeerCommunicationError(
-                        "Cannot resolve peer address: no resolver and no cached address",
-                        peer_uuid=peer_uuid
-                    )
-
-            # Paramètres de retry depuis la config
-            max_retries = self.config.get('MAX_CONNECTION_RETRIES', DEFAULT_MAX_RETRIES)
-            retry_delay = self.config.get('CONNECTION_RETRY_DELAY_SECONDS', DEFAULT_RETRY_DELAY)
-            timeout = self.config['RPC_TIMEOUT_SECONDS']
+        # DÉSACTIVER la réutilisation de connexion pour éviter les conflits de concurrence
+        # Le bug "readexactly() called while another coroutine is already waiting"
+        # se produit quand plusieurs envois simultanés réutilisent la même connexion
+        
+        # Toujours créer une nouvelle connexion
+        # if peer_uuid in self._connections:
+        #     conn = self._connections[peer_uuid]
+        #     if conn.is_connected:
+        #         conn.last_used = datetime.utcnow()
+        #         return conn
+
+        # Résoudre l'adresse si nécessaire
+        if ip_address is None or port is None:
+            resolved_address = await self._resolve_peer_with_fallback(peer_uuid)
+            if resolved_address:
+                ip_address, port = resolved_address
+            else:
+                raise PeerCommunicationError(
+                    "Cannot resolve peer address: no resolver and no cached address",
+                    peer_uuid=peer_uuid
+                )
 
-            last_error = None
+        # Paramètres de retry depuis la config
+        max_retries = self.config.get('MAX_CONNECTION_RETRIES', DEFAULT_MAX_RETRIES)
+        retry_delay = self.config.get('CONNECTION_RETRY_DELAY_SECONDS', DEFAULT_RETRY_DELAY)
+        timeout = self.config['RPC_TIMEOUT_SECONDS']
 
-            # Boucle de retry avec backoff exponentiel
-            for attempt in range(max_retries + 1):
-                try:
-                    if attempt > 0:
-                        # Calculer le délai avec backoff exponentiel
-                        current_delay = min(
-                            retry_delay * (DEFAULT_BACKOFF_MULTIPLIER ** (attempt - 1)),
-                            DEFAULT_MAX_RETRY_DELAY
-                        )
-                        self.logger.info(
-                            f"Retry {attempt}/{max_retries} pour {ip_address}:{port} "
-                            f"dans {current_delay:.1f}s..."
-                        )
-                        await asyncio.sleep(current_delay)
+        last_error = None
 
-                    self.logger.info(
-                        f"Connexion à {ip_address}:{port} (timeout={timeout}s, "
-                        f"tentative {attempt + 1}/{max_retries + 1})..."
+        # Boucle de retry avec backoff exponentiel
+        for attempt in range(max_retries + 1):
+            try:
+                if attempt > 0:
+                    # Calculer le délai avec backoff exponentiel
+                    current_delay = min(
+                        retry_delay * (DEFAULT_BACKOFF_MULTIPLIER ** (attempt - 1)),
+                        DEFAULT_MAX_RETRY_DELAY
                     )
-                    reader, writer = await asyncio.wait_for(
-                        asyncio.open_connection(ip_address, port),
-                        timeout=timeout
+                    self.logger.info(
+                        f"Retry {attempt}/{max_retries} pour {ip_address}:{port} "
+                        f"dans {current_delay:.1f}s..."
                     )
+                    await asyncio.sleep(current_delay)
 
-                    conn = PeerConnection(
-                        peer_uuid=peer_uuid,
-                        ip_address=ip_address,
-                        port=port,
-                        reader=reader,
-                        writer=writer,
-                        is_connected=True,
-                    )
+                self.logger.info(
+                    f"Connexion à {ip_address}:{port} (timeout={timeout}s, "
+                    f"tentative {attempt + 1}/{max_retries + 1})..."
+                )
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_connection(ip_address, port),
+                    timeout=timeout
+                )
+                tune_stream_socket(
+                    writer, self.config.get('SOCKET_BUFFER_SIZE', 1024 * 1024)
+                )
 
+                conn = PeerConnection(
+                    peer_uuid=peer_uuid,
+                    ip_address=ip_address,
+                    port=port,
+                    reader=reader,
+                    writer=writer,
+                    is_connected=True,
+                )
+
+                # Verrou limité à la mise à jour du registre: les connexions
+                # (et leurs délais de retry) vers des peers différents se
+                # font en parallèle
+                async with self._get_lock():
                     self._connections[peer_uuid] = conn
-                    self.logger.info(f"✓ Connexion établie vers {peer_uuid} ({ip_address}:{port})")
+                self.logger.info(f"✓ Connexion établie vers {peer_uuid} ({ip_address}:{port})")
 
-                    return conn
+                return conn
 
-                except asyncio.TimeoutError:
-                    last_error = PeerCommunicationError(
-                        "Connection timeout",
-                        peer_uuid=peer_uuid,
-                        peer_address=f"{ip_address}:{port}",
-                        operation="connect"
-                    )
-                    self.logger.warning(
-                        f"✗ Timeout connexion à {ip_address}:{port} "
-                        f"(tentative {attempt + 1}/{max_retries + 1})"
-                    )
-                except ConnectionRefusedError:
-                    last_error = PeerCommunicationError(
-                        "Connection refused",
-                        peer_uuid=peer_uuid,
-                        peer_address=f"{ip_address}:{port}",
-                        operation="connect"
-                    )
-                    self.logger.warning(
-                        f"✗ Connexion refusée par {ip_address}:{port} "
-                        f"(tentative {attempt + 1}/{max_retries + 1})"
-                    )
-                except OSError as e:
-                    # Erreurs réseau (network unreachable, etc.)
-                    last_error = PeerCommunicationError(
-                        f"Network error: {e}",
-                        peer_uuid=peer_uuid,
-                        peer_address=f"{ip_address}:{port}",
-                        operation="connect"
-                    )
-                    self.logger.warning(
-                        f"✗ Erreur réseau vers {ip_address}:{port}: {e} "
-                        f"(tentative {attempt + 1}/{max_retries + 1})"
-                    )
-                except Exception as e:
-                    last_error = PeerCommunicationError(
-                        f"Connection failed: {e}",
-                        peer_uuid=peer_uuid,
-                        peer_address=f"{ip_address}:{port}",
-                        operation="connect"
-                    )
-                    self.logger.warning(
-                        f"✗ Erreur connexion à {ip_address}:{port}: {e} "
-                        f"(tentative {attempt + 1}/{max_retries + 1})"
-                    )
+            except asyncio.TimeoutError:
+                last_error = PeerCommunicationError(
+                    "Connection timeout",
+                    peer_uuid=peer_uuid,
+                    peer_address=f"{ip_address}:{port}",
+                    operation="connect"
+                )
+                self.logger.warning(
+                    f"✗ Timeout connexion à {ip_address}:{port} "
+                    f"(tentative {attempt + 1}/{max_retries + 1})"
+                )
+            except ConnectionRefusedError:
+                last_error = PeerCommunicationError(
+                    "Connection refused",
+                    peer_uuid=peer_uuid,
+                    peer_address=f"{ip_address}:{port}",
+                    operation="connect"
+                )
+                self.logger.warning(
+                    f"✗ Connexion refusée par {ip_address}:{port} "
+                    f"(tentative {attempt + 1}/{max_retries + 1})"
+                )
+            except OSError as e:
+                # Erreurs réseau (network unreachable, etc.)
+                last_error = PeerCommunicationError(
+                    f"Network error: {e}",
+                    peer_uuid=peer_uuid,
+                    peer_address=f"{ip_address}:{port}",
+                    operation="connect"
+                )
+                self.logger.warning(
+                    f"✗ Erreur réseau vers {ip_address}:{port}: {e} "
+                    f"(tentative {attempt + 1}/{max_retries + 1})"
+                )
+            except Exception as e:
+                last_error = PeerCommunicationError(
+                    f"Connection failed: {e}",
+                    peer_uuid=peer_uuid,
+                    peer_address=f"{ip_address}:{port}",
+                    operation="connect"
+                )
+                self.logger.warning(
+                    f"✗ Erreur connexion à {ip_address}:{port}: {e} "
+                    f"(tentative {attempt + 1}/{max_retries + 1})"
+                )
 
-            # Tous les retries ont échoué
-            self.logger.error(
-                f"✗ Échec définitif connexion à {ip_address}:{port} "
-                f"après {max_retries + 1} tentatives"
-            )
-            raise last_error
+        # Tous les retries ont échoué
+        self.logger.error(
+            f"✗ Échec définitif connexion à {ip_address}:{port} "
+            f"après {max_retries + 1} tentatives"
+        )
+        raise last_error
 
     async def _resolve_peer_with_fallback(self, peer_uuid: str) -> Optional[Tuple[str, int]]:
         """
@@ -419,25 +472,31 @@ class PeerRPC:
         
         raise ValueError(f"Cannot resolve peer: {peer_uuid}")
     
-    async def _close_connection(self, peer_uuid: str) -> None:
+    async def _close_connection(self, peer_uuid: str, conn: Optional[PeerConnection] = None) -> None:
         """
         Ferme une connexion à un peer.
         
         Args:
             peer_uuid: UUID du peer
+            conn: Connexion précise à fermer (défaut: la dernière ouverte vers
+                  ce peer). Plusieurs requêtes vers un même peer peuvent être
+                  en vol: seule celle en échec doit être fermée.
         """
-        async with self._lock:
-            if peer_uuid in self._connections:
-                conn = self._connections[peer_uuid]
-                if conn.writer:
-                    conn.writer.close()
-                    try:
-                        await conn.writer.wait_closed()
-                    except Exception:
-                        pass
-                conn.is_connected = False
+        async with self._get_lock():
+            if conn is None:
+                conn = self._connections.get(peer_uuid)
+            if conn is not None and self._connections.get(peer_uuid) is conn:
                 del self._connections[peer_uuid]
-                self.logger.debug(f"Connexion fermée: {peer_uuid}")
+        # Fermeture hors du verrou: wait_closed() peut attendre le peer
+        if conn is not None:
+            if conn.writer:
+                conn.writer.close()
+                try:
+                    await conn.writer.wait_closed()
+                except Exception:
+                    pass
+            conn.is_connected = False
+            self.logger.debug(f"Connexion fermée: {peer_uuid}")
     
     async def close(self) -> None:
         """
@@ -486,11 +545,10 @@ class PeerRPC:
         }
 
         # Sérialiser
-        request_json = json.dumps(request)
-        request_bytes = request_json.encode('utf-8')
+        request_bytes = dumps_message(request)
 
         # Ajouter la longueur en préfixe (4 bytes big-endian)
-        length_prefix = len(request_bytes).to_bytes(4, 'big')
+        length_prefix = LENGTH_PREFIX.pack(len(request_bytes))
 
         # Calculer le timeout adaptatif basé sur la taille des données
         base_timeout = self.config['RPC_TIMEOUT_SECONDS']
@@ -505,7 +563,8 @@ class PeerRPC:
 
         try:
             # Envoyer
-            conn.writer.write(length_prefix + request_bytes)
+            # Préfixe et corps en un seul envoi (sendmsg), sans copier le corps
+            conn.writer.writelines((length_prefix, request_bytes))
             await conn.writer.drain()
 
             self.logger.debug(
@@ -519,7 +578,7 @@ class PeerRPC:
                 conn.reader.readexactly(4),
                 timeout=timeout
             )
-            response_length = int.from_bytes(length_bytes, 'big')
+            (response_length,) = LENGTH_PREFIX.unpack(length_bytes)
 
             # Recalculer le timeout pour la réponse si elle est grande
             response_timeout = calculate_adaptive_timeout(response_length, base_timeout)
@@ -530,7 +589,8 @@ class PeerRPC:
                 timeout=response_timeout
             )
             
-            response = json.loads(response_bytes.decode('utf-8'))
+            # Parse direct des bytes (pas de copie str intermédiaire de la réponse)
+            response = loads_message(response_bytes)
             
             self.logger.debug(
                 f"Réponse reçue de {conn.peer_uuid}: {len(response_bytes)} bytes"
@@ -607,10 +667,10 @@ class PeerRPC:
 
         try:
             return await self._send_request(conn, method, params, data_size_hint)
-        except PeerCommunicationError:
-            # Fermer la connexion en cas d'erreur
-            await self._close_connection(peer_uuid)
-            raise
+        finally:
+            # Une connexion par requête (pas de réutilisation): toujours la
+            # fermer, en succès comme en erreur, pour ne pas fuir de socket
+            await self._close_connection(peer_uuid, conn)
     
     # ==========================================================================
     # MÉTHODES RPC SPÉCIFIQUES
@@ -668,23 +728,31 @@ class PeerRPC:
         file_uuid: str,
         chunk_idx: int,
         owner_uuid: str,
-        chunk_data: bytes,
+        chunk_data: Optional[bytes],
         content_hash: str,
         ip_address: Optional[str] = None,
-        port: Optional[int] = None
+        port: Optional[int] = None,
+        chunk_data_b64: Optional[str] = None,
+        chunk_size: Optional[int] = None
     ) -> Dict[str, Any]:
         """
         Envoie un chunk à stocker sur un peer distant.
         
+        Le chunk peut être fourni déjà encodé en base64 (chunk_data_b64),
+        par exemple tel que reçu d'un autre peer via get_chunk(decode=False):
+        il est alors relayé sans décodage ni ré-encodage.
+        
         Args:
             peer_uuid: UUID du peer cible
             file_uuid: UUID du fichier
             chunk_idx: Index du chunk
             owner_uuid: UUID du propriétaire
-            chunk_data: Données du chunk
+            chunk_data: Données du chunk (None si chunk_data_b64 est fourni)
             content_hash: Hash SHA-256 du contenu
             ip_address: Adresse IP (optionnel)
             port: Port (optionnel)
+            chunk_data_b64: Données déjà encodées en base64 (optionnel)
+            chunk_size: Taille décodée du chunk si chunk_data_b64 est fourni
             
         Returns:
             {
@@ -693,24 +761,31 @@ class PeerRPC:
                 'expires_at': str (timestamp)
             }
         """
-        # Encoder les données en base64 pour le JSON
-        chunk_b64 = base64.b64encode(chunk_data).decode('ascii')
+        if chunk_data_b64 is not None and (not content_hash or chunk_size is None):
+            # Impossible de relayer sans hash ni taille: repasser par les bytes
+            chunk_data = binascii.a2b_base64(chunk_data_b64)
+            chunk_data_b64 = None
         
-        # Calculer le hash si non fourni
-        if not content_hash:
-            content_hash = compute_chunk_hash(chunk_data)
+        if chunk_data_b64 is None:
+            # Encoder les données en base64 pour le JSON
+            chunk_data_b64 = base64.b64encode(chunk_data).decode('ascii')
+            chunk_size = len(chunk_data)
+            
+            # Calculer le hash si non fourni
+            if not content_hash:
+                content_hash = compute_chunk_hash(chunk_data)
         
         params = {
             'file_uuid': file_uuid,
             'chunk_idx': chunk_idx,
             'owner_uuid': owner_uuid,
-            'chunk_data_b64': chunk_b64,
+            'chunk_data_b64': chunk_data_b64,
             'content_hash': content_hash,
-            'chunk_size': len(chunk_data),
+            'chunk_size': chunk_size,
         }
 
         # Utiliser la taille du chunk (base64 = ~1.33x la taille originale)
-        data_size_hint = int(len(chunk_data) * 1.4)
+        data_size_hint = int(chunk_size * 1.4)
 
         result = await self.call(
             peer_uuid, 'store_chunk', params, ip_address, port,
@@ -725,7 +800,8 @@ class PeerRPC:
         chunk_idx: int,
         owner_uuid: str,
         ip_address: Optional[str] = None,
-        port: Optional[int] = None
+        port: Optional[int] = None,
+        decode: bool = True
     ) -> Dict[str, Any]:
         """
         Récupère un chunk depuis un peer distant.
@@ -737,12 +813,14 @@ class PeerRPC:
             owner_uuid: UUID du propriétaire
             ip_address: Adresse IP (optionnel)
             port: Port (optionnel)
+            decode: Si False, conserve 'chunk_data_b64' tel quel (relais)
             
         Returns:
             {
                 'success': bool,
-                'chunk_data': bytes,
-                'content_hash': str
+                'chunk_data': bytes (ou 'chunk_data_b64': str si decode=False),
+                'content_hash': str,
+                'size_bytes': int
             }
         """
         params = {
@@ -754,8 +832,10 @@ class PeerRPC:
         result = await self.call(peer_uuid, 'get_chunk', params, ip_address, port)
         
         # Décoder les données
-        if result.get('success') and 'chunk_data_b64' in result:
-            chunk_data = base64.b64decode(result['chunk_data_b64'])
+        if decode and result.get('success') and 'chunk_data_b64' in result:
+            # a2b_base64 lit directement la str ASCII (pas de copie en bytes
+            # intermédiaire comme b64decode)
+            chunk_data = binascii.a2b_base64(result['chunk_data_b64'])
             result['chunk_data'] = chunk_data
             del result['chunk_data_b64']
         
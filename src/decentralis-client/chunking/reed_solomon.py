@@ -24,7 +24,7 @@ Example:
 
 import logging
 from typing import List, Tuple, Dict, Optional
-from functools import reduce
+from functools import reduce, lru_cache
 from operator import xor
 
 from .models import LocalGroup
@@ -32,14 +32,109 @@ from .exceptions import (
     ChunkEncodingError, ChunkDecodingError, InsufficientChunksError
 )
 
-# Import de reedsolo pour l'encodage Reed-Solomon
+# Import de reedsolo pour l'encodage Reed-Solomon.
+# creedsolo (extension Cython livrée avec reedsolo, compilée si Cython est
+# présent à l'installation) est préférée: même API, même code, bien plus rapide.
 try:
-    from reedsolo import RSCodec, ReedSolomonError
+    from creedsolo import RSCodec, ReedSolomonError
     REEDSOLO_AVAILABLE = True
 except ImportError:
-    REEDSOLO_AVAILABLE = False
-    RSCodec = None
-    ReedSolomonError = Exception
+    try:
+        from reedsolo import RSCodec, ReedSolomonError
+        REEDSOLO_AVAILABLE = True
+    except ImportError:
+        REEDSOLO_AVAILABLE = False
+        RSCodec = None
+        ReedSolomonError = Exception
+
+
+# ============================================================================
+# CODAGE MATRICIEL SUR GF(2^8)
+# ============================================================================
+# Le code RS systématique est linéaire: chaque chunk de parité, et chaque chunk
+# de données manquant, est une combinaison linéaire des chunks connus dont les
+# coefficients ne dépendent que de (k, nsym) et des indices disponibles. Ils
+# sont calculés une fois avec le codec reedsolo lui-même (même code, même
+# résultat), puis appliqués aux chunks entiers: multiplication par une
+# constante = table de 256 octets via bytes.translate, addition = XOR sur
+# entiers. Tout le travail par octet s'exécute en C.
+
+_GF_PRIM = 0x11d  # Polynôme primitif par défaut de reedsolo
+
+
+def _build_gf_mul_tables() -> List[bytes]:
+    """Tables de multiplication: _GF_MUL_TABLES[c][v] = c * v dans GF(2^8)."""
+    exp = [0] * 510
+    log = [0] * 256
+    x = 1
+    for i in range(255):
+        exp[i] = exp[i + 255] = x
+        log[x] = i
+        x <<= 1
+        if x & 0x100:
+            x ^= _GF_PRIM
+    tables = [bytes(256)]
+    for c in range(1, 256):
+        lc = log[c]
+        tables.append(bytes([0] + [exp[lc + log[v]] for v in range(1, 256)]))
+    return tables
+
+
+_GF_MUL_TABLES = _build_gf_mul_tables()
+
+
+def _gf_combine(coefs: Tuple[int, ...], chunks: List[bytes], size: int) -> bytes:
+    """Retourne somme(coefs[i] * chunks[i]) sur GF(2^8), octet par octet."""
+    acc = 0
+    for c, chunk in zip(coefs, chunks):
+        if c == 0:
+            continue
+        if c != 1:
+            chunk = chunk.translate(_GF_MUL_TABLES[c])
+        acc ^= int.from_bytes(chunk, 'little')
+    return acc.to_bytes(size, 'little')
+
+
+@lru_cache(maxsize=16)
+def _get_codec(nsym: int, nsize: int = 255) -> 'RSCodec':
+    """RSCodec partagé par (nsym, nsize): tables et polynôme générateur ne sont
+    construits qu'une fois par processus."""
+    return RSCodec(nsym, nsize=nsize)
+
+
+@lru_cache(maxsize=16)
+def _parity_matrix(k: int, nsym: int) -> Tuple[Tuple[int, ...], ...]:
+    """Coefficients P[j][i] tels que parité j = somme_i P[j][i] * donnée i.
+
+    Colonne i = parité du vecteur unitaire e_i encodé par reedsolo.
+    """
+    codec = _get_codec(nsym, k + nsym)
+    columns = []
+    for i in range(k):
+        unit = bytearray(k)
+        unit[i] = 1
+        columns.append(codec.encode(unit)[k:])
+    return tuple(tuple(col[j] for col in columns) for j in range(nsym))
+
+
+@lru_cache(maxsize=64)
+def _recovery_matrix(k: int, nsym: int, sources: Tuple[int, ...],
+                     missing: Tuple[int, ...]) -> Tuple[Tuple[int, ...], ...]:
+    """Coefficients R[x][s] tels que donnée missing[x] = somme_s R[x][s] * chunk sources[s].
+
+    sources contient k indices disponibles. Colonne s = mot de code valant 1
+    en sources[s] et 0 sur les autres sources, reconstruit par reedsolo en
+    déclarant tous les autres indices comme effacements.
+    """
+    n = k + nsym
+    codec = _get_codec(nsym, n)
+    erase_pos = [i for i in range(n) if i not in sources]
+    columns = []
+    for s in sources:
+        word = bytearray(n)
+        word[s] = 1
+        columns.append(codec.decode(word, erase_pos=erase_pos)[0])
+    return tuple(tuple(col[i] for col in columns) for i in missing)
 
 
 class ReedSolomonEncoder:
@@ -120,7 +215,7 @@ class ReedSolomonEncoder:
         # Initialiser le codec Reed-Solomon
         if REEDSOLO_AVAILABLE:
             try:
-                self.codec = RSCodec(self.nsym)
+                self.codec = _get_codec(self.nsym)
                 self.logger.debug(f"RSCodec initialisé avec nsym={self.nsym}")
             except Exception as e:
                 raise ChunkEncodingError(
@@ -170,14 +265,14 @@ class ReedSolomonEncoder:
             # Calculer la taille de chaque chunk de données
             chunk_size = (len(data) + self.k - 1) // self.k
             
-            # Padding pour avoir une taille multiple de k
-            padded_data = data + bytes(chunk_size * self.k - len(data))
-            
-            # Diviser en chunks de données
-            data_chunks = [
-                padded_data[i * chunk_size:(i + 1) * chunk_size]
-                for i in range(self.k)
-            ]
+            # Diviser en chunks de données. Seuls les derniers chunks (incomplets)
+            # sont complétés par des zéros: pas de copie paddée des données entières
+            data_chunks = []
+            for i in range(self.k):
+                chunk = data[i * chunk_size:(i + 1) * chunk_size]
+                if len(chunk) < chunk_size:
+                    chunk = chunk + bytes(chunk_size - len(chunk))
+                data_chunks.append(chunk)
             
             self.logger.debug(
                 f"Données divisées en {self.k} chunks de {chunk_size} bytes"
@@ -215,35 +310,16 @@ class ReedSolomonEncoder:
         Returns:
             Liste des chunks de parité
         """
-        parity_chunks = []
-        
-        # Pour chaque position de byte dans les chunks
-        for byte_pos in range(chunk_size):
-            # Collecter les bytes à cette position dans tous les chunks
-            data_bytes = bytes([
-                chunk[byte_pos] if byte_pos < len(chunk) else 0
-                for chunk in data_chunks
-            ])
-            
-            # Encoder avec Reed-Solomon
-            encoded = self.codec.encode(data_bytes)
-            
-            # Les bytes de parité sont à la fin
-            parity_bytes = encoded[len(data_bytes):]
-            
-            # Initialiser les chunks de parité si nécessaire
-            while len(parity_chunks) < len(parity_bytes):
-                parity_chunks.append(bytearray(chunk_size))
-            
-            # Stocker les bytes de parité
-            for i, pb in enumerate(parity_bytes):
-                parity_chunks[i][byte_pos] = pb
-        
-        # Convertir en bytes
-        parity_chunks = [bytes(chunk) for chunk in parity_chunks]
-        
-        # Limiter au nombre demandé
-        return parity_chunks[:self.m]
+        k = len(data_chunks)
+        data_chunks = [
+            chunk if len(chunk) == chunk_size else bytes(chunk).ljust(chunk_size, b'\0')
+            for chunk in data_chunks
+        ]
+        matrix = _parity_matrix(k, self.nsym)
+        return [
+            _gf_combine(matrix[j], data_chunks, chunk_size)
+            for j in range(min(self.nsym, self.m))
+        ]
     
     def _generate_parity_xor(self, data_chunks: List[bytes]) -> List[bytes]:
         """
@@ -345,6 +421,10 @@ class ReedSolomonEncoder:
         """
         Décode avec Reed-Solomon.
         
+        Les effacements sont les mêmes pour toutes les positions de byte: les
+        chunks de données manquants sont des combinaisons linéaires de k
+        chunks disponibles, calculées sur les chunks entiers.
+        
         Args:
             chunks: Chunks disponibles
             original_size: Taille originale
@@ -352,53 +432,39 @@ class ReedSolomonEncoder:
         Returns:
             Données reconstruites
         """
+        k = self.k
+        n = k + self.nsym
         chunk_size = len(next(iter(chunks.values())))
-        result = bytearray(chunk_size * self.k)
         
-        # Pour chaque position de byte
-        for byte_pos in range(chunk_size):
-            # Construire le vecteur avec erasures
-            data_with_erasures = bytearray(self.k + self.nsym)
-            erasure_positions = []
-            
-            for i in range(self.k):
-                if i in chunks and byte_pos < len(chunks[i]):
-                    data_with_erasures[i] = chunks[i][byte_pos]
-                else:
-                    erasure_positions.append(i)
-            
-            # Ajouter les bytes de parité disponibles
-            for i in range(self.m):
-                parity_idx = self.k + i
-                if parity_idx in chunks and byte_pos < len(chunks[parity_idx]):
-                    if i < self.nsym:
-                        data_with_erasures[self.k + i] = chunks[parity_idx][byte_pos]
-                else:
-                    if i < self.nsym:
-                        erasure_positions.append(self.k + i)
-            
-            try:
-                # Décoder avec les positions d'effacement
-                # reedsolo.decode retourne (data, ecc, errata_pos) 
-                decoded_result = self.codec.decode(
-                    bytes(data_with_erasures), 
-                    erase_pos=erasure_positions[:self.nsym]
-                )
-                
-                # Extraire les données décodées (premier élément du tuple)
-                decoded_data = decoded_result[0] if isinstance(decoded_result, tuple) else decoded_result
-                
-                # Extraire les bytes de données
-                for i in range(self.k):
-                    result[i * chunk_size + byte_pos] = decoded_data[i]
-                    
-            except ReedSolomonError as e:
-                raise ChunkDecodingError(
-                    f"Reed-Solomon decode failed at byte {byte_pos}",
-                    {"error": str(e)}
-                )
+        # k sources parmi les symboles RS disponibles, données en priorité
+        sources = tuple(
+            i for i in range(min(n, k + self.m))
+            if i in chunks and len(chunks[i]) == chunk_size
+        )[:k]
+        if len(sources) < k:
+            raise ChunkDecodingError(
+                "Reed-Solomon decode failed: not enough usable chunks",
+                {"usable": list(sources), "required": k}
+            )
+        missing = tuple(i for i in range(k) if i not in sources)
+        
+        try:
+            matrix = _recovery_matrix(k, self.nsym, sources, missing)
+        except ReedSolomonError as e:
+            raise ChunkDecodingError(
+                "Reed-Solomon decode failed",
+                {"error": str(e), "sources": list(sources)}
+            )
         
-        return bytes(result)[:original_size]
+        source_chunks = [chunks[i] for i in sources]
+        recovered = {
+            i: _gf_combine(matrix[x], source_chunks, chunk_size)
+            for x, i in enumerate(missing)
+        }
+        result = b''.join(
+            recovered[i] if i in recovered else chunks[i] for i in range(k)
+        )
+        return result[:original_size]
     
     def _decode_xor(self, chunks: Dict[int, bytes], original_size: int) -> bytes:
         """
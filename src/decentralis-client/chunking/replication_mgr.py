@@ -11,15 +11,17 @@ Example:
     >>> mgr = ReplicationManager(db, "my-peer-uuid")
 """
 
+import heapq
+import time
 import logging
 import asyncio
 from datetime import datetime, timedelta
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterable, Tuple
 
 from .config import CHUNKING_CONFIG
 from .models import (
     ChunkAssignment, ReplicationTask, PeerInfo,
-    StoredChunk, ChunkMetadata
+    StoredChunk, ChunkMetadata, compute_chunk_hash
 )
 from .exceptions import (
     ReplicationError, PeerCommunicationError, InsufficientChunksError
@@ -27,6 +29,10 @@ from .exceptions import (
 from .chunk_db import ChunkDatabase
 
 
+# Durée de validité (secondes) du cache local des infos peers
+PEER_CACHE_TTL_SECONDS = 2.0
+
+
 class ReplicationManager:
     """
     Gestionnaire de réplication et relocalisation des chunks.
@@ -84,6 +90,7 @@ class ReplicationManager:
         # État interne
         self._processing = False
         self._last_cleanup = datetime.utcnow()
+        self._peer_cache: Dict[str, Tuple[float, Optional[Dict[str, Any]]]] = {}
         
         self.logger.info(f"ReplicationManager initialisé pour peer {peer_uuid}")
     
@@ -114,10 +121,11 @@ class ReplicationManager:
         self.logger.warning(f"Peer déconnecté détecté: {peer_uuid}")
         
         # Marquer le peer comme hors ligne
-        self.db.set_peer_offline(peer_uuid)
+        await asyncio.to_thread(self.db.set_peer_offline, peer_uuid)
+        self._invalidate_peer_cache(peer_uuid)
         
         # Récupérer tous les chunks stockés par ce peer
-        locations = self.db.get_locations_by_peer(peer_uuid)
+        locations = await asyncio.to_thread(self.db.get_locations_by_peer, peer_uuid)
         
         if not locations:
             self.logger.info(f"Aucun chunk à relocaliser pour {peer_uuid}")
@@ -125,7 +133,29 @@ class ReplicationManager:
         
         self.logger.info(f"Création de {len(locations)} tâches de relocalisation")
         
-        # Créer une tâche de relocalisation pour chaque chunk
+        # Créer les tâches de relocalisation hors de la boucle d'événements
+        await asyncio.to_thread(self._create_relocation_tasks, peer_uuid, locations)
+        
+        # Mettre à jour le score de fiabilité
+        await self._decrease_peer_reliability(peer_uuid)
+        
+        # Lancer le traitement
+        asyncio.create_task(self.process_pending_relocations())
+    
+    def _create_relocation_tasks(
+        self,
+        peer_uuid: str,
+        locations: List[ChunkAssignment]
+    ) -> None:
+        """
+        Crée une tâche de relocalisation pour chaque chunk confirmé d'un peer.
+        
+        Méthode synchrone destinée à être exécutée via asyncio.to_thread.
+        
+        Args:
+            peer_uuid: UUID du peer déconnecté
+            locations: Localisations stockées par ce peer
+        """
         for location in locations:
             if location.status == 'confirmed':
                 task = ReplicationTask(
@@ -146,12 +176,6 @@ class ReplicationManager:
                     'relocated',
                     'Peer disconnected'
                 )
-        
-        # Mettre à jour le score de fiabilité
-        await self._decrease_peer_reliability(peer_uuid)
-        
-        # Lancer le traitement
-        asyncio.create_task(self.process_pending_relocations())
     
     async def _decrease_peer_reliability(self, peer_uuid: str) -> None:
         """
@@ -160,11 +184,12 @@ class ReplicationManager:
         Args:
             peer_uuid: UUID du peer
         """
-        peer = self.db.get_peer(peer_uuid)
+        peer = await asyncio.to_thread(self.db.get_peer, peer_uuid)
         if peer:
             current_score = peer.get('reliability_score', 0.5)
             new_score = max(0.0, current_score - 0.1)
-            self.db.update_peer_reliability(peer_uuid, new_score)
+            await asyncio.to_thread(self.db.update_peer_reliability, peer_uuid, new_score)
+            self._invalidate_peer_cache(peer_uuid)
             self.logger.debug(
                 f"Score de fiabilité diminué pour {peer_uuid}: "
                 f"{current_score:.2f} -> {new_score:.2f}"
@@ -198,12 +223,21 @@ class ReplicationManager:
             self.logger.debug("Traitement déjà en cours")
             return 0
         
+        # Différer si aucune relocalisation ne peut aboutir (démarrage à froid,
+        # partition réseau): évite de consommer les tentatives pour rien
+        if self.peer_rpc is None and self.chunk_store is None:
+            self.logger.info("Relocalisations différées: aucune source de chunks disponible")
+            return 0
+        if not await asyncio.to_thread(self.db.has_online_peers):
+            self.logger.info("Relocalisations différées: aucun peer en ligne")
+            return 0
+        
         self._processing = True
         successful = 0
         
         try:
             # Récupérer les tâches en attente
-            pending_tasks = self.db.get_pending_replications()
+            pending_tasks = await asyncio.to_thread(self.db.get_pending_replications)
             
             if not pending_tasks:
                 self.logger.debug("Aucune relocalisation en attente")
@@ -259,11 +293,13 @@ class ReplicationManager:
         
         try:
             # Trouver un peer de remplacement
-            exclude_peers = [task.source_peer_uuid]
-            if task.target_peer_uuid:
-                exclude_peers.append(task.target_peer_uuid)
+            exclude_peers = frozenset(
+                uuid for uuid in (task.source_peer_uuid, task.target_peer_uuid) if uuid
+            )
             
-            replacement_peer = self._select_replacement_peer(exclude_peers)
+            replacement_peer = await asyncio.to_thread(
+                self._select_replacement_peer, exclude_peers
+            )
             
             if not replacement_peer:
                 self.logger.warning("Aucun peer disponible pour relocalisation")
@@ -273,14 +309,14 @@ class ReplicationManager:
             task.target_peer_uuid = replacement_peer['uuid']
             
             # Récupérer le chunk
-            chunk_data = await self._get_chunk_for_relocation(
+            chunk_payload = await self._get_chunk_for_relocation(
                 task.file_uuid,
                 task.chunk_idx,
                 task.owner_uuid,
                 exclude_peers
             )
             
-            if chunk_data is None:
+            if chunk_payload is None:
                 task.fail("Could not retrieve chunk from any source")
                 return False
             
@@ -290,7 +326,7 @@ class ReplicationManager:
                 task.file_uuid,
                 task.chunk_idx,
                 task.owner_uuid,
-                chunk_data
+                chunk_payload
             )
             
             if success:
@@ -303,9 +339,9 @@ class ReplicationManager:
                     owner_uuid=task.owner_uuid,
                     peer_uuid=task.target_peer_uuid,
                     status='confirmed',
-                    confirmed_at=datetime.utcnow(),
+                    confirmed_at=task.completed_at,
                 )
-                self.db.add_location(new_assignment)
+                await asyncio.to_thread(self.db.add_location, new_assignment)
                 
                 # Mettre à jour le score du nouveau peer
                 await self._increase_peer_reliability(task.target_peer_uuid)
@@ -329,11 +365,15 @@ class ReplicationManager:
         file_uuid: str,
         chunk_idx: int,
         owner_uuid: str,
-        exclude_peers: List[str]
-    ) -> Optional[bytes]:
+        exclude_peers: Iterable[str]
+    ) -> Optional[Dict[str, Any]]:
         """
         Récupère un chunk pour relocalisation depuis une source disponible.
         
+        Un chunk distant est conservé sous sa forme base64 reçue, avec le
+        hash annoncé par la source, afin d'être relayé tel quel au peer de
+        remplacement (pas de décodage/ré-encodage intermédiaire).
+        
         Args:
             file_uuid: UUID du fichier
             chunk_idx: Index du chunk
@@ -341,26 +381,34 @@ class ReplicationManager:
             exclude_peers: Peers à exclure
             
         Returns:
-            Données du chunk ou None
+            {'chunk_data': bytes} pour un chunk local,
+            {'chunk_data_b64': str, 'content_hash': str, 'size_bytes': int}
+            pour un chunk distant, ou None
         """
+        exclude = frozenset(exclude_peers)
+        
         # D'abord essayer le store local
         if self.chunk_store:
-            chunk_data = self.chunk_store.get_chunk(owner_uuid, file_uuid, chunk_idx)
+            chunk_data = await asyncio.to_thread(
+                self.chunk_store.get_chunk, owner_uuid, file_uuid, chunk_idx
+            )
             if chunk_data:
                 self.logger.debug(f"Chunk {chunk_idx} trouvé localement")
-                return chunk_data
+                return {'chunk_data': chunk_data}
         
         # Sinon chercher sur le réseau
-        locations = self.db.get_locations(file_uuid, chunk_idx, owner_uuid)
+        locations = await asyncio.to_thread(
+            self.db.get_locations, file_uuid, chunk_idx, owner_uuid
+        )
         
         for location in locations:
-            if location.peer_uuid in exclude_peers:
+            if location.peer_uuid in exclude:
                 continue
             if location.status != 'confirmed':
                 continue
             
             # Vérifier si le peer est en ligne
-            peer = self.db.get_peer(location.peer_uuid)
+            peer = await self._get_peer_cached(location.peer_uuid)
             if not peer or not peer.get('is_online'):
                 continue
             
@@ -371,10 +419,11 @@ class ReplicationManager:
                         peer_uuid=location.peer_uuid,
                         file_uuid=file_uuid,
                         chunk_idx=chunk_idx,
-                        owner_uuid=owner_uuid
+                        owner_uuid=owner_uuid,
+                        decode=False
                     )
-                    if result and result.get('chunk_data'):
-                        return result['chunk_data']
+                    if result and result.get('chunk_data_b64'):
+                        return result
                 except Exception as e:
                     self.logger.debug(
                         f"Échec récupération depuis {location.peer_uuid}: {e}"
@@ -388,7 +437,7 @@ class ReplicationManager:
         file_uuid: str,
         chunk_idx: int,
         owner_uuid: str,
-        chunk_data: bytes
+        chunk_payload: Dict[str, Any]
     ) -> bool:
         """
         Envoie un chunk au peer de remplacement.
@@ -398,7 +447,7 @@ class ReplicationManager:
             file_uuid: UUID du fichier
             chunk_idx: Index du chunk
             owner_uuid: UUID du propriétaire
-            chunk_data: Données du chunk
+            chunk_payload: Chunk tel que retourné par _get_chunk_for_relocation
             
         Returns:
             True si l'envoi a réussi
@@ -408,13 +457,21 @@ class ReplicationManager:
             return True  # Simuler le succès pour les tests
         
         try:
+            content_hash = chunk_payload.get('content_hash')
+            chunk_data = chunk_payload.get('chunk_data')
+            if not content_hash and chunk_data is not None:
+                # SHA-256 (accéléré matériellement via OpenSSL), hors de la boucle
+                content_hash = await asyncio.to_thread(compute_chunk_hash, chunk_data)
+            
             result = await self.peer_rpc.store_chunk(
                 peer_uuid=peer_uuid,
                 file_uuid=file_uuid,
                 chunk_idx=chunk_idx,
                 owner_uuid=owner_uuid,
                 chunk_data=chunk_data,
-                content_hash=""  # TODO: calculer le hash
+                content_hash=content_hash or "",
+                chunk_data_b64=chunk_payload.get('chunk_data_b64'),
+                chunk_size=chunk_payload.get('size_bytes')
             )
             return result.get('success', False)
         except Exception as e:
@@ -425,9 +482,42 @@ class ReplicationManager:
     # SÉLECTION DE PEER
     # ==========================================================================
     
+    async def _get_peer_cached(self, peer_uuid: str) -> Optional[Dict[str, Any]]:
+        """
+        Récupère les infos d'un peer via un cache à durée de vie courte.
+        
+        Évite une requête SQL par localisation candidate lors des
+        relocalisations en masse.
+        
+        Args:
+            peer_uuid: UUID du peer
+            
+        Returns:
+            Dictionnaire avec les infos du peer ou None
+        """
+        cached = self._peer_cache.get(peer_uuid)
+        if cached is not None and time.monotonic() - cached[0] < PEER_CACHE_TTL_SECONDS:
+            return cached[1]
+        
+        peer = await asyncio.to_thread(self.db.get_peer, peer_uuid)
+        self._peer_cache[peer_uuid] = (time.monotonic(), peer)
+        return peer
+    
+    def _invalidate_peer_cache(self, peer_uuid: Optional[str] = None) -> None:
+        """
+        Invalide le cache des peers.
+        
+        Args:
+            peer_uuid: Peer à invalider (tous si None)
+        """
+        if peer_uuid is None:
+            self._peer_cache.clear()
+        else:
+            self._peer_cache.pop(peer_uuid, None)
+    
     def _select_replacement_peer(
         self,
-        exclude_peers: List[str]
+        exclude_peers: Iterable[str]
     ) -> Optional[Dict[str, Any]]:
         """
         Sélectionne un peer de remplacement pour stocker un chunk.
@@ -436,48 +526,42 @@ class ReplicationManager:
         - Peer en ligne
         - Score de fiabilité supérieur au minimum
         - Pas dans la liste d'exclusion
-        - Tri par score de fiabilité décroissant
+        - Meilleur score de fiabilité, puis moins de chunks stockés
         
         Args:
-            exclude_peers: Liste des UUIDs de peers à exclure
+            exclude_peers: UUIDs de peers à exclure
             
         Returns:
             Dictionnaire avec les infos du peer sélectionné, ou None
         """
         min_score = self.config['PEER_SELECTION']['MIN_RELIABILITY_SCORE']
         
+        # Peers exclus (blacklistés + notre propre peer), test O(1)
+        exclude = frozenset(exclude_peers) | {self.peer_uuid}
+        
         # Récupérer les peers en ligne
         online_peers = self.db.get_online_peers()
         
         # Filtrer
-        candidates = []
-        for peer in online_peers:
-            # Exclure les peers blacklistés
-            if peer['uuid'] in exclude_peers:
-                continue
-            
-            # Exclure notre propre peer
-            if peer['uuid'] == self.peer_uuid:
-                continue
-            
-            # Vérifier le score
-            if peer.get('reliability_score', 0) < min_score:
-                continue
-            
-            candidates.append(peer)
+        candidates = [
+            peer for peer in online_peers
+            if peer['uuid'] not in exclude
+            and peer.get('reliability_score', 0) >= min_score
+        ]
         
         if not candidates:
             return None
         
-        # Trier par score décroissant puis par nombre de chunks croissant
-        candidates.sort(
+        # Meilleur score décroissant puis nombre de chunks croissant
+        # (sélection O(N) plutôt qu'un tri complet O(N log N))
+        return heapq.nsmallest(
+            1,
+            candidates,
             key=lambda p: (
                 -p.get('reliability_score', 0),
                 p.get('chunks_stored', 0)
             )
-        )
-        
-        return candidates[0]
+        )[0]
     
     # ==========================================================================
     # GESTION DE L'EXPIRATION
@@ -488,49 +572,45 @@ class ReplicationManager:
         Nettoie les chunks expirés (après 30 jours).
         
         Cette méthode:
-        1. Identifie les chunks expirés
-        2. Les supprime du disque local
-        3. Les supprime de la base de données
-        4. Notifie les propriétaires (optionnel)
+        1. Supprime les chunks expirés de la base (une seule requête)
+        2. Supprime les fichiers correspondants du disque local
         
         Returns:
             Nombre de chunks supprimés
         """
         self.logger.info("Nettoyage des chunks expirés...")
         
-        # Récupérer les chunks expirés
-        expired_chunks = self.db.get_expired_chunks()
+        # Supprimer de la base en une seule requête
+        try:
+            expired_chunks = await asyncio.to_thread(self.db.delete_expired_chunks)
+        except Exception as e:
+            self.logger.error(f"Erreur suppression des chunks expirés en base: {e}")
+            return 0
         
         if not expired_chunks:
             self.logger.debug("Aucun chunk expiré")
             return 0
         
-        deleted_count = 0
+        deleted_count = len(expired_chunks)
         
-        for chunk in expired_chunks:
-            try:
-                # Supprimer du disque
-                if self.chunk_store:
-                    self.chunk_store.delete_chunk(
-                        chunk.owner_uuid,
-                        chunk.file_uuid,
-                        chunk.chunk_idx
+        # Supprimer les fichiers du disque en parallèle
+        if self.chunk_store:
+            results = await asyncio.gather(
+                *(
+                    asyncio.to_thread(
+                        self.chunk_store.delete_chunk,
+                        owner_uuid, file_uuid, chunk_idx
+                    )
+                    for owner_uuid, file_uuid, chunk_idx in expired_chunks
+                ),
+                return_exceptions=True
+            )
+            for (owner_uuid, file_uuid, chunk_idx), result in zip(expired_chunks, results):
+                if isinstance(result, Exception):
+                    self.logger.error(
+                        f"Erreur suppression chunk expiré "
+                        f"{file_uuid}#{chunk_idx}: {result}"
                     )
-                
-                # Supprimer de la base
-                self.db.delete_chunk(
-                    chunk.file_uuid,
-                    chunk.chunk_idx,
-                    chunk.owner_uuid
-                )
-                
-                deleted_count += 1
-                
-            except Exception as e:
-                self.logger.error(
-                    f"Erreur suppression chunk expiré "
-                    f"{chunk.file_uuid}#{chunk.chunk_idx}: {e}"
-                )
         
         self.logger.info(f"Chunks expirés supprimés: {deleted_count}")
         self._last_cleanup = datetime.utcnow()
@@ -556,7 +636,7 @@ class ReplicationManager:
         """
         try:
             # Mettre à jour les métadonnées
-            metadata = self.db.get_file_metadata(file_uuid)
+            metadata = await asyncio.to_thread(self.db.get_file_metadata, file_uuid)
             if not metadata:
                 return False
             
@@ -567,7 +647,7 @@ class ReplicationManager:
             new_expires = datetime.utcnow() + timedelta(days=extension_days)
             metadata.expires_at = new_expires
             
-            self.db.update_file_metadata(metadata)
+            await asyncio.to_thread(self.db.update_file_metadata, metadata)
             
             self.logger.info(
                 f"Rétention prolongée pour {file_uuid} jusqu'à {new_expires}"
@@ -591,28 +671,36 @@ class ReplicationManager:
         - Nombre de chunks stockés
         - Historique de succès/échecs
         """
-        online_peers = self.db.get_online_peers()
         uptime_bonus = self.config['PEER_SELECTION']['UPTIME_BONUS']
         
-        for peer in online_peers:
+        # Mise à jour en une seule requête UPDATE côté SQLite
+        unparsed_peers = await asyncio.to_thread(self.db.apply_uptime_bonus, uptime_bonus)
+        self._invalidate_peer_cache()
+        
+        # Repli Python pour les peers dont first_seen n'est pas au format SQLite
+        now = datetime.utcnow()  # Une seule horloge pour tout le lot
+        
+        for peer in unparsed_peers:
             peer_uuid = peer['uuid']
             current_score = peer.get('reliability_score', 0.5)
             
             # Calculer le bonus d'uptime
             first_seen = peer.get('first_seen')
-            if first_seen:
+            try:
                 if isinstance(first_seen, str):
                     first_seen = datetime.fromisoformat(first_seen)
-                
-                days_online = (datetime.utcnow() - first_seen).days
-                bonus = min(uptime_bonus * days_online, 0.3)  # Max +0.3
-                new_score = min(1.0, current_score + bonus)
-            else:
-                new_score = current_score
+            except ValueError:
+                continue
+            
+            days_online = (now - first_seen).days
+            bonus = min(uptime_bonus * days_online, 0.3)  # Max +0.3
+            new_score = min(1.0, current_score + bonus)
             
             # Mettre à jour si changement significatif
             if abs(new_score - current_score) > 0.01:
-                self.db.update_peer_reliability(peer_uuid, new_score)
+                await asyncio.to_thread(
+                    self.db.update_peer_reliability, peer_uuid, new_score
+                )
     
     async def _increase_peer_reliability(self, peer_uuid: str) -> None:
         """
@@ -621,11 +709,12 @@ class ReplicationManager:
         Args:
             peer_uuid: UUID du peer
         """
-        peer = self.db.get_peer(peer_uuid)
+        peer = await asyncio.to_thread(self.db.get_peer, peer_uuid)
         if peer:
             current_score = peer.get('reliability_score', 0.5)
             new_score = min(1.0, current_score + 0.05)
-            self.db.update_peer_reliability(peer_uuid, new_score)
+            await asyncio.to_thread(self.db.update_peer_reliability, peer_uuid, new_score)
+            self._invalidate_peer_cache(peer_uuid)
     
     # ==========================================================================
     # MONITORING DES CHUNKS À RISQUE
@@ -643,41 +732,12 @@ class ReplicationManager:
         Returns:
             Liste de dictionnaires avec les infos des chunks à risque
         """
-        at_risk = []
-        
-        # Récupérer toutes les métadonnées de fichiers
-        # (On devrait avoir une méthode pour lister tous les fichiers)
         try:
-            # Utiliser une requête SQL directe pour efficacité
-            cursor = self.db.conn.cursor()
-            cursor.execute("""
-                SELECT 
-                    cl.file_uuid,
-                    cl.chunk_idx,
-                    cl.owner_uuid,
-                    COUNT(*) as replica_count,
-                    MIN(p.reliability_score) as min_reliability
-                FROM chunk_locations cl
-                LEFT JOIN peers p ON cl.peer_uuid = p.uuid
-                WHERE cl.status = 'confirmed'
-                GROUP BY cl.file_uuid, cl.chunk_idx, cl.owner_uuid
-                HAVING replica_count <= 1 OR min_reliability < 0.5
-            """)
-            
-            for row in cursor.fetchall():
-                at_risk.append({
-                    'file_uuid': row['file_uuid'],
-                    'chunk_idx': row['chunk_idx'],
-                    'owner_uuid': row['owner_uuid'],
-                    'replica_count': row['replica_count'],
-                    'min_reliability': row['min_reliability'],
-                    'risk_level': 'high' if row['replica_count'] <= 1 else 'medium'
-                })
-                
+            # Agrégation SQL mise en cache et invalidée par ChunkDatabase
+            return self.db.get_chunks_at_risk()
         except Exception as e:
             self.logger.error(f"Erreur détection chunks à risque: {e}")
-        
-        return at_risk
+            return []
     
     def get_replication_stats(self) -> Dict[str, Any]:
         """
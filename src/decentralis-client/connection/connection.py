@@ -1,73 +1,311 @@
 import socket
 import json
 import time
+import queue
+import asyncio
 import threading
 
+# orjson (optionnel) sérialise/parse directement en bytes, 2 à 6x plus vite que json.
+# Le format reste du JSON compact (sans espaces): le tracker ne parle que JSON.
+try:
+    import orjson
+
+    def _dumps(payload):
+        return orjson.dumps(payload)
+
+    def _loads(data):
+        return orjson.loads(data)  # accepte directement un memoryview
+except ImportError:
+    def _dumps(payload):
+        return json.dumps(payload, separators=(',', ':')).encode()
+
+    def _loads(data):
+        return json.loads(bytes(data))
+
+# Derniers octets possibles d'une réponse JSON complète ('}' ']' ou blanc final):
+# on ne tente un parse qu'après l'un d'eux
+_JSON_END_BYTES = frozenset(b'}]\n\r ')
+
 
 class connection:
 
-    def __init__(self, srv_addr, srv_port, peer_ip, peer_port, keepalive_interval):
+    def __init__(self, srv_addr, srv_port, peer_ip, peer_port, keepalive_interval, loop=None,
+                 connect_timeout=None):
         self.uuid = None
         self.srv_addr = srv_addr
         self.srv_port = srv_port
         self.peer_ip = peer_ip
         self.peer_port = peer_port
         self.keepalive_interval = keepalive_interval
+        # Délai max d'établissement TCP vers le tracker (None: délai de l'OS, ~75 s)
+        self.connect_timeout = connect_timeout
         self._stop_event = threading.Event()  # Event par instance
+        self._loop = loop
+        # Réveil de la boucle keepalive (annonce immédiate ou arrêt)
+        self._wake = threading.Event()
+        self._async_wake = None
+        self._keepalive_future = None
+        # Dernière réponse getpeers, consommée sans blocage par l'interface
+        self.peer_queue = queue.Queue(maxsize=1)
+        # Tampon de réception réutilisé d'une requête à l'autre
+        self._recv_buf = bytearray(65536)
+        self._recv_lock = threading.Lock()
+        # Sockets des requêtes en cours, fermées par close() pour ne pas bloquer
+        self._active_socks = set()
+        self._socks_lock = threading.Lock()
 
         # Effectue une annonce initiale et récupère les pairs,
-        # puis démarre la boucle périodique dans un thread daemon.
+        # puis démarre la boucle périodique.
         # Ne bloque plus le thread appelant (utile pour une interface graphique).
-        self.announce()
-        self.get_peers()
-        self._thread = threading.Thread(target=self.periodic_announce, daemon=True)
-        self._thread.start()
+        # Un tracker injoignable fait échouer la construction (OSError) au lieu
+        # de laisser une connexion morte.
+        self.refresh(raise_errors=True)
+        if loop is not None:
+            # Boucle asyncio fournie: keepalive en tâche sur cette boucle,
+            # sans thread dédié
+            self._keepalive_future = asyncio.run_coroutine_threadsafe(
+                self.periodic_announce_async(), loop
+            )
+        else:
+            self._thread = threading.Thread(target=self.periodic_announce, daemon=True)
+            self._thread.start()
+
+    def _wake_keepalive(self):
+        self._wake.set()
+        if self._loop is not None and self._async_wake is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._async_wake.set)
+            except RuntimeError:
+                pass  # Boucle déjà fermée
+
+    def announce_now(self):
+        """Déclenche immédiatement une annonce + mise à jour des pairs,
+        sans attendre la fin de l'intervalle de keepalive."""
+        self._wake_keepalive()
 
     def close(self):
         """Arrête proprement la boucle périodique de cette instance."""
         self._stop_event.set()
+        self._wake_keepalive()
+        # Interrompre les requêtes en vol: recv/connect retournent immédiatement
+        with self._socks_lock:
+            socks = list(self._active_socks)
+            self._active_socks.clear()
+        for s in socks:
+            try:
+                s.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            try:
+                s.close()
+            except OSError:
+                pass
         try:
             if hasattr(self, '_thread') and self._thread.is_alive():
                 self._thread.join(timeout=2)
         except Exception:
             pass
 
-    def send_request(self, payload):
+    def send_request(self, payload, raise_errors=False):
+        """Envoie une requête au tracker et retourne sa réponse JSON.
+
+        Les erreurs réseau sont affichées et donnent {}, sauf si raise_errors
+        est vrai: elles sont alors propagées à l'appelant.
+        """
+        if self._stop_event.is_set():
+            return {}
         with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+            with self._socks_lock:
+                self._active_socks.add(s)
             try:
+                # Requêtes courtes: désactiver Nagle pour ne pas attendre l'ACK retardé
+                s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                s.settimeout(self.connect_timeout)
                 s.connect((self.srv_addr, self.srv_port))
-                s.sendall(json.dumps(payload).encode())
-                response = s.recv(4096)
+                s.settimeout(None)
+                s.sendall(_dumps(payload))
+                with self._recv_lock:
+                    return self._recv_response(s)
             except Exception as e:
-                print("Erreur de connexion au tracker:", e)
+                if not self._stop_event.is_set():
+                    if raise_errors:
+                        raise
+                    print("Erreur de connexion au tracker:", e)
                 return {}
-        return json.loads(response.decode())
+            finally:
+                with self._socks_lock:
+                    self._active_socks.discard(s)
 
+    def _recv_response(self, s):
+        """Lit la réponse JSON complète du tracker dans le tampon réutilisable.
 
-    def announce(self):
-        req = {"action": "announce", "ip": self.peer_ip, "port": self.peer_port}
+        Le tracker n'envoie pas de préfixe de longueur: on lit jusqu'à ce que le
+        contenu reçu soit un JSON complet ou que le tracker ferme la connexion.
+        Les listes de pairs plus grandes que 4 KiB ne sont plus tronquées.
+        """
+        buf = self._recv_buf
+        n = 0
+        while True:
+            if n == len(buf):
+                buf.extend(bytes(len(buf)))  # Agrandir (x2) pour les grosses réponses
+            received = s.recv_into(memoryview(buf)[n:])
+            if not received:
+                break
+            n += received
+            if buf[n - 1] in _JSON_END_BYTES:
+                try:
+                    return _loads(memoryview(buf)[:n])
+                except ValueError:
+                    continue  # Réponse incomplète, continuer la lecture
+        if not n:
+            return {}
+        return _loads(memoryview(buf)[:n])
+
+
+    def _announce_request(self):
+        # "peers": demande au tracker de joindre la liste des pairs à la réponse
+        # (champ ignoré par les trackers qui ne le gèrent pas)
+        req = {"action": "announce", "ip": self.peer_ip, "port": self.peer_port, "peers": True}
         if self.uuid:
             req["uuid"] = self.uuid
-        resp = self.send_request(req)
+        return req
+
+
+    def announce(self, raise_errors=False):
+        resp = self.send_request(self._announce_request(), raise_errors)
         self.uuid = resp.get("uuid", self.uuid)
         print("Annonce envoyée:", resp)
         return resp
 
 
-    def get_peers(self):
+    def get_peers(self, raise_errors=False):
         req = {"action": "getpeers"}
         if self.uuid:
             req["uuid"] = self.uuid
-        resp = self.send_request(req)
+        resp = self.send_request(req, raise_errors)
         print("Pairs récupérés:", resp.get("peers", []))
+        self._publish_peers(resp)
         return resp
 
 
+    def refresh(self, raise_errors=False):
+        """Annonce le peer et publie la liste des pairs.
+
+        Si le tracker renvoie déjà les pairs dans la réponse d'annonce, la
+        requête getpeers (connexion TCP + aller-retour) est évitée.
+        """
+        resp = self.announce(raise_errors)
+        if isinstance(resp.get("peers"), list):
+            self._publish_peers(resp)
+            return resp
+        return self.get_peers(raise_errors)
+
+
+    def _publish_peers(self, resp):
+        """Place la réponse dans peer_queue en ne gardant que la plus récente."""
+        while True:
+            try:
+                self.peer_queue.put_nowait(resp)
+                return
+            except queue.Full:
+                try:
+                    self.peer_queue.get_nowait()
+                except queue.Empty:
+                    pass
+
+
     def periodic_announce(self):
         """Boucle de keepalive - annonce périodiquement le peer au tracker."""
-        while not self._stop_event.wait(self.keepalive_interval):
+        while not self._stop_event.is_set():
+            # Réveillé à l'échéance, par announce_now() ou par close()
+            self._wake.wait(self.keepalive_interval)
+            self._wake.clear()
+            if self._stop_event.is_set():
+                break
             try:
-                self.announce()
-                self.get_peers()
+                self.refresh()
             except Exception as e:
                 print(f"Erreur dans periodic_announce: {e}")
+
+
+    async def send_request_async(self, payload):
+        """Variante asyncio de send_request (ne bloque pas la boucle d'événements)."""
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(self.srv_addr, self.srv_port),
+                timeout=self.connect_timeout
+            )
+        except Exception as e:
+            print("Erreur de connexion au tracker:", e)
+            return {}
+        try:
+            sock = writer.get_extra_info('socket')
+            if sock is not None:
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            writer.write(_dumps(payload))
+            await writer.drain()
+            response = bytearray()
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    break
+                response += data
+                # Pas de parse à chaque bloc reçu (coût quadratique sur les
+                # grosses listes de pairs): seulement si la fin peut être atteinte
+                if response[-1] not in _JSON_END_BYTES:
+                    continue
+                try:
+                    return _loads(response)
+                except ValueError:
+                    continue  # Réponse incomplète
+        except Exception as e:
+            print("Erreur de connexion au tracker:", e)
+            return {}
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except Exception:
+                pass
+        return _loads(response) if response else {}
+
+
+    async def announce_async(self):
+        resp = await self.send_request_async(self._announce_request())
+        self.uuid = resp.get("uuid", self.uuid)
+        return resp
+
+
+    async def get_peers_async(self):
+        req = {"action": "getpeers"}
+        if self.uuid:
+            req["uuid"] = self.uuid
+        resp = await self.send_request_async(req)
+        self._publish_peers(resp)
+        return resp
+
+
+    async def refresh_async(self):
+        """Variante asyncio de refresh."""
+        resp = await self.announce_async()
+        if isinstance(resp.get("peers"), list):
+            self._publish_peers(resp)
+            return resp
+        return await self.get_peers_async()
+
+
+    async def periodic_announce_async(self):
+        """Boucle de keepalive asyncio, utilisée quand une boucle est fournie."""
+        self._async_wake = asyncio.Event()
+        while not self._stop_event.is_set():
+            try:
+                await asyncio.wait_for(self._async_wake.wait(), timeout=self.keepalive_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._async_wake.clear()
+            if self._stop_event.is_set():
+                return
+            try:
+                await self.refresh_async()
+            except Exception as e:
+                print(f"Erreur dans periodic_announce_async: {e}")
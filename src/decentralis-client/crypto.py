@@ -1,70 +1,361 @@
+import io
 import os
+import mmap
+import platform
+import secrets
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import BinaryIO, List, Optional, Sequence, Tuple, Union
 
-from cryptography.hazmat.primitives.ciphers.aead import AESGCM, ChaCha20Poly1305
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from cryptography.hazmat.primitives.ciphers.aead import ChaCha20Poly1305
 
 
-def _ensure_key_bytes(key_hex: str, expected_len: int):
+NONCE_SIZE = 12
+TAG_SIZE = 16
+# Taille des blocs lus/écrits lors du chiffrement en flux (1 MiB)
+STREAM_BLOCK_SIZE = 1024 * 1024
+# Nombre de nonces tirés d'un coup dans le pool
+NONCE_POOL_COUNT = 1024
+# Au-delà de cette taille, l'entrée et la sortie sont projetées en mémoire (mmap)
+MMAP_THRESHOLD = 10 * 1024 * 1024
+
+
+def _detect_preferred_aead() -> str:
+    """Choisit l'AEAD le plus rapide pour ce CPU.
+
+    AES-GCM n'est rapide (et à temps constant) qu'avec les instructions AES +
+    multiplication sans retenue (AES-NI/PCLMULQDQ sur x86, AES/PMULL sur ARM);
+    sans elles ChaCha20-Poly1305 est 3 à 4x plus rapide.
+    """
+    try:
+        with open('/proc/cpuinfo', 'r', encoding='utf-8', errors='ignore') as f:
+            flags = set()
+            for line in f:
+                key, _, value = line.partition(':')
+                if key.strip() in ('flags', 'Features'):
+                    flags.update(value.split())
+        if flags:
+            has_aes = 'aes' in flags
+            has_clmul = 'pclmulqdq' in flags or 'pmull' in flags
+            return 'AES-256' if has_aes and has_clmul else 'ChaCha20'
+    except OSError:
+        pass
+    # Hors Linux: les CPU x86-64 et ARM64 courants disposent de ces instructions
+    machine = platform.machine().lower()
+    if machine in ('x86_64', 'amd64', 'arm64', 'aarch64'):
+        return 'AES-256'
+    return 'ChaCha20'
+
+
+# Sondé une seule fois par processus
+PREFERRED_AEAD = _detect_preferred_aead()
+
+
+def resolve_algorithm(algorithm: str) -> str:
+    """Remplace 'auto' par l'AEAD préféré pour ce CPU."""
+    if not algorithm or algorithm.lower() == 'auto':
+        return PREFERRED_AEAD
+    return algorithm
+
+
+@lru_cache(maxsize=16)
+def _ensure_key_bytes(key_hex, expected_len: int) -> bytes:
+    # Mémoïsé: une même clé est décodée une seule fois par processus (bytes immuables).
+    # Accepte la clé brute (bytes) ou sa forme hexadécimale (str).
     if not key_hex:
         raise ValueError('Clé manquante')
-    try:
-        key = bytes.fromhex(key_hex)
-    except Exception as e:
-        raise ValueError('Clé invalide (doit être hex)') from e
+    if isinstance(key_hex, bytes):
+        key = key_hex
+    else:
+        try:
+            key = bytes.fromhex(key_hex)
+        except Exception as e:
+            raise ValueError('Clé invalide (doit être hex)') from e
     if len(key) != expected_len:
         raise ValueError(f'Clé de longueur incorrecte ({len(key)} bytes), attendu {expected_len} bytes')
     return key
 
 
+@lru_cache(maxsize=32)
+def _aes_algorithm(key: bytes) -> algorithms.AES:
+    """Retourne l'objet algorithms.AES pour une clé, mémoïsé par clé."""
+    return algorithms.AES(key)
+
+
+def clear_key_cache() -> None:
+    """Oublie les clés mémoïsées par _ensure_key_bytes et _aes_algorithm."""
+    _ensure_key_bytes.cache_clear()
+    _aes_algorithm.cache_clear()
+
+
+# Pool de nonces: un seul appel au RNG système pour NONCE_POOL_COUNT fichiers.
+# Le PID propriétaire est mémorisé pour qu'un processus forké ne réutilise
+# jamais les nonces hérités de son parent.
+_nonce_pool = bytearray()
+_nonce_pid = None
+_nonce_lock = threading.Lock()
+
+
+def _fresh_nonce() -> bytes:
+    """Retourne un nonce aléatoire de NONCE_SIZE octets, jamais réutilisé."""
+    global _nonce_pool, _nonce_pid
+    with _nonce_lock:
+        pid = os.getpid()
+        if not _nonce_pool or _nonce_pid != pid:
+            _nonce_pool = bytearray(secrets.token_bytes(NONCE_SIZE * NONCE_POOL_COUNT))
+            _nonce_pid = pid
+        nonce = bytes(_nonce_pool[-NONCE_SIZE:])
+        del _nonce_pool[-NONCE_SIZE:]
+        return nonce
+
+
+def _stream_through(ctx, fin, fout, remaining=None) -> None:
+    """Passe fin dans le contexte de chiffrement ctx par blocs et écrit dans fout.
+
+    Un seul tampon d'entrée et un seul tampon de sortie sont réutilisés.
+    Si remaining est fourni, au plus remaining octets sont lus.
+    """
+    buf = bytearray(STREAM_BLOCK_SIZE)
+    out = bytearray(STREAM_BLOCK_SIZE + 15)  # update_into exige len(buf) + 15
+    view = memoryview(buf)
+    while remaining is None or remaining > 0:
+        want = STREAM_BLOCK_SIZE if remaining is None else min(STREAM_BLOCK_SIZE, remaining)
+        n = fin.readinto(view[:want])
+        if not n:
+            break
+        written = ctx.update_into(view[:n], out)
+        fout.write(memoryview(out)[:written])
+        if remaining is not None:
+            remaining -= n
+
+
+def _encrypt_mmap(encryptor, nonce: bytes, in_path: str, out_path: str, size: int) -> None:
+    """Chiffre via mmap: le chiffré est écrit directement dans les pages du fichier
+    de sortie, sans copie intermédiaire côté Python."""
+    out_size = NONCE_SIZE + size + TAG_SIZE
+    with open(in_path, 'rb') as fin, open(out_path, 'w+b') as fout:
+        fout.truncate(out_size)
+        with mmap.mmap(fin.fileno(), 0, access=mmap.ACCESS_READ) as mm_in, \
+                mmap.mmap(fout.fileno(), out_size) as mm_out:
+            src = memoryview(mm_in)
+            dst = memoryview(mm_out)
+            try:
+                dst[:NONCE_SIZE] = nonce
+                for off in range(0, size, STREAM_BLOCK_SIZE):
+                    end = min(off + STREAM_BLOCK_SIZE, size)
+                    # GCM est un mode flux: update_into écrit exactement end - off octets
+                    encryptor.update_into(src[off:end], dst[NONCE_SIZE + off:])
+                encryptor.finalize()
+                dst[NONCE_SIZE + size:] = encryptor.tag
+            finally:
+                # Les vues doivent être libérées avant la fermeture des mmap
+                src.release()
+                dst.release()
+
+
+def _encrypt_stream_aes(fin: BinaryIO, out_path: str, alg: algorithms.AES) -> None:
+    """Chiffre le contenu de fin en flux avec AES-256-GCM (nonce aléatoire)."""
+    nonce = _fresh_nonce()
+    encryptor = Cipher(alg, modes.GCM(nonce)).encryptor()
+    with open(out_path, 'wb') as fout:
+        fout.write(nonce)
+        _stream_through(encryptor, fin, fout)
+        fout.write(encryptor.finalize())
+        fout.write(encryptor.tag)
+
+
+def _encrypt_file_aes(in_path: str, out_path: str, alg: algorithms.AES) -> None:
+    """Chiffre in_path en flux avec AES-256-GCM (nonce aléatoire)."""
+    size = os.path.getsize(in_path)
+    if size >= MMAP_THRESHOLD:
+        nonce = _fresh_nonce()
+        encryptor = Cipher(alg, modes.GCM(nonce)).encryptor()
+        _encrypt_mmap(encryptor, nonce, in_path, out_path, size)
+        return
+    with open(in_path, 'rb') as fin:
+        _encrypt_stream_aes(fin, out_path, alg)
+
+
+def _encrypt_chacha(data: bytes, out_path: str, key: bytes) -> None:
+    chacha = ChaCha20Poly1305(key)
+    nonce = _fresh_nonce()
+    ct = chacha.encrypt(nonce, data, None)
+    with open(out_path, 'wb') as f:
+        # Deux écritures plutôt que nonce + ct: évite une copie du chiffré entier
+        f.write(nonce)
+        f.write(ct)
+
+
 def encrypt_file(in_path: str, out_path: str, key_hex: str, algorithm: str = 'AES-256') -> None:
     """Encrypt the whole file and write to out_path.
 
-    File format: nonce (12 bytes) + ciphertext
-    """
-    data = None
-    with open(in_path, 'rb') as f:
-        data = f.read()
+    File format: nonce (12 bytes) + ciphertext + tag (16 bytes)
+    key_hex: clé hexadécimale ou clé brute (bytes, 32 octets)
 
+    AES-256-GCM est chiffré en flux (mémoire bornée à quelques MiB quelle que
+    soit la taille du fichier), le format produit est identique à AESGCM.
+    """
     if algorithm == 'AES-256':
         key = _ensure_key_bytes(key_hex, 32)
-        aesgcm = AESGCM(key)
-        nonce = os.urandom(12)
-        ct = aesgcm.encrypt(nonce, data, None)
-        with open(out_path, 'wb') as f:
-            f.write(nonce + ct)
+        _encrypt_file_aes(in_path, out_path, _aes_algorithm(key))
     elif algorithm == 'ChaCha20':
-        key = _ensure_key_bytes(key_hex, 32)
-        chacha = ChaCha20Poly1305(key)
-        nonce = os.urandom(12)
-        ct = chacha.encrypt(nonce, data, None)
-        with open(out_path, 'wb') as f:
-            f.write(nonce + ct)
+        # Pas d'API en flux pour ChaCha20-Poly1305 dans cryptography
+        with open(in_path, 'rb') as f:
+            data = f.read()
+        _encrypt_chacha(data, out_path, _ensure_key_bytes(key_hex, 32))
     else:
         raise ValueError('Algorithme non supporté')
 
 
+def encrypt_stream(fin: BinaryIO, out_path: str, key_hex: str, algorithm: str = 'AES-256') -> None:
+    """Chiffre le contenu d'un objet fichier binaire (ex: io.BytesIO) vers out_path.
+
+    Même format que encrypt_file: permet de chiffrer un contenu construit en
+    mémoire sans l'écrire d'abord en clair dans un fichier temporaire.
+    """
+    if algorithm == 'AES-256':
+        _encrypt_stream_aes(fin, out_path, _aes_algorithm(_ensure_key_bytes(key_hex, 32)))
+    elif algorithm == 'ChaCha20':
+        _encrypt_chacha(fin.read(), out_path, _ensure_key_bytes(key_hex, 32))
+    else:
+        raise ValueError('Algorithme non supporté')
+
+
+def _encrypt_source(source: Union[str, bytes], out_path: str, key_hex: str, algorithm: str) -> None:
+    """Chiffre un chemin de fichier ou un contenu déjà en mémoire (bytes)."""
+    if isinstance(source, (bytes, bytearray)):
+        encrypt_stream(io.BytesIO(source), out_path, key_hex, algorithm)
+    else:
+        encrypt_file(source, out_path, key_hex, algorithm)
+
+
 def decrypt_file(in_path: str, out_path: str, key_hex: str, algorithm: str = 'AES-256') -> None:
     """Decrypt file previously created by encrypt_file.
 
-    Expects first 12 bytes to be nonce.
+    Expects first 12 bytes to be nonce and last 16 bytes to be the tag.
+    En cas d'échec d'authentification, out_path est supprimé.
     """
-    with open(in_path, 'rb') as f:
-        blob = f.read()
-    if len(blob) < 12:
+    if algorithm not in ('AES-256', 'ChaCha20'):
+        raise ValueError('Algorithme non supporté')
+    key = _ensure_key_bytes(key_hex, 32)
+
+    size = os.path.getsize(in_path)
+    if size < NONCE_SIZE + TAG_SIZE:
         raise ValueError('Fichier chiffré invalide')
-    nonce = blob[:12]
-    ct = blob[12:]
 
     if algorithm == 'AES-256':
-        key = _ensure_key_bytes(key_hex, 32)
-        aesgcm = AESGCM(key)
-        pt = aesgcm.decrypt(nonce, ct, None)
-        with open(out_path, 'wb') as f:
-            f.write(pt)
-    elif algorithm == 'ChaCha20':
-        key = _ensure_key_bytes(key_hex, 32)
+        with open(in_path, 'rb') as fin:
+            nonce = fin.read(NONCE_SIZE)
+            fin.seek(-TAG_SIZE, os.SEEK_END)
+            tag = fin.read(TAG_SIZE)
+            fin.seek(NONCE_SIZE)
+            decryptor = Cipher(_aes_algorithm(key), modes.GCM(nonce, tag)).decryptor()
+            try:
+                with open(out_path, 'wb') as fout:
+                    _stream_through(decryptor, fin, fout, size - NONCE_SIZE - TAG_SIZE)
+                    fout.write(decryptor.finalize())
+            except Exception:
+                # Ne jamais laisser de clair non authentifié sur disque
+                try:
+                    os.remove(out_path)
+                except OSError:
+                    pass
+                raise
+    else:
+        with open(in_path, 'rb') as f:
+            blob = f.read()
+        # Vues sur le blob lu: pas de copie du chiffré
+        view = memoryview(blob)
+        nonce = view[:NONCE_SIZE]
+        ct = view[NONCE_SIZE:]
         chacha = ChaCha20Poly1305(key)
         pt = chacha.decrypt(nonce, ct, None)
         with open(out_path, 'wb') as f:
             f.write(pt)
+
+
+def encrypt_bytes(data: bytes, key_hex: str, algorithm: str = 'AES-256') -> bytes:
+    """Chiffre un contenu en mémoire; même format que encrypt_file
+    (nonce + chiffré + tag), sans passer par le disque."""
+    key = _ensure_key_bytes(key_hex, 32)
+    nonce = _fresh_nonce()
+    if algorithm == 'AES-256':
+        encryptor = Cipher(_aes_algorithm(key), modes.GCM(nonce)).encryptor()
+        return b''.join((nonce, encryptor.update(data), encryptor.finalize(), encryptor.tag))
+    elif algorithm == 'ChaCha20':
+        return nonce + ChaCha20Poly1305(key).encrypt(nonce, data, None)
     else:
         raise ValueError('Algorithme non supporté')
+
+
+def decrypt_bytes(blob: bytes, key_hex: str, algorithm: str = 'AES-256') -> bytes:
+    """Déchiffre en mémoire un contenu produit par encrypt_file ou encrypt_bytes.
+
+    Lève une exception (InvalidTag) si l'authentification échoue.
+    """
+    if algorithm not in ('AES-256', 'ChaCha20'):
+        raise ValueError('Algorithme non supporté')
+    key = _ensure_key_bytes(key_hex, 32)
+    if len(blob) < NONCE_SIZE + TAG_SIZE:
+        raise ValueError('Fichier chiffré invalide')
+
+    # Vues sur le blob: pas de copie du chiffré
+    view = memoryview(blob)
+    nonce = view[:NONCE_SIZE]
+    if algorithm == 'AES-256':
+        decryptor = Cipher(_aes_algorithm(key), modes.GCM(bytes(nonce), bytes(view[-TAG_SIZE:]))).decryptor()
+        return decryptor.update(view[NONCE_SIZE:-TAG_SIZE]) + decryptor.finalize()
+    return ChaCha20Poly1305(key).decrypt(nonce, view[NONCE_SIZE:], None)
+
+
+# ============================================================================
+# CHIFFREMENT PARALLÈLE
+# ============================================================================
+
+def encrypt_files(paths: Sequence[Tuple[Union[str, bytes], str]], key_hex: str,
+                  algorithm: str = 'AES-256',
+                  max_workers: Optional[int] = None) -> List[Optional[Exception]]:
+    """Chiffre plusieurs fichiers indépendants en parallèle sur tous les cœurs.
+
+    Pool de threads et non de processus: les primitives AEAD de cryptography
+    relâchent le GIL, le clair n'est pas recopié vers des processus fils, et
+    aucun fork n'a lieu depuis l'interface (multi-threadée), où un fils pourrait
+    hériter d'un verrou tenu (_nonce_lock) et rester bloqué.
+
+    Args:
+        paths: Couples (source, out_path); source est un chemin ou le clair en bytes
+        key_hex: Clé hexadécimale commune au lot
+        algorithm: 'AES-256' ou 'ChaCha20'
+        max_workers: Nombre de threads (défaut: nombre de CPU)
+
+    Returns:
+        Une entrée par couple, dans l'ordre: None si succès, sinon l'exception levée.
+    """
+    if algorithm not in ('AES-256', 'ChaCha20'):
+        raise ValueError('Algorithme non supporté')
+    # Valide la clé (et remplit les caches) avant de démarrer les threads
+    _ensure_key_bytes(key_hex, 32)
+
+    paths = list(paths)
+    workers = min(max_workers or os.cpu_count() or 1, len(paths))
+    results: List[Optional[Exception]] = [None] * len(paths)
+
+    if workers <= 1:
+        for i, (source, out_path) in enumerate(paths):
+            try:
+                _encrypt_source(source, out_path, key_hex, algorithm)
+            except Exception as e:
+                results[i] = e
+        return results
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='encrypt') as pool:
+        futures = [pool.submit(_encrypt_source, source, out_path, key_hex, algorithm)
+                   for source, out_path in paths]
+        for i, fut in enumerate(futures):
+            try:
+                fut.result()
+            except Exception as e:
+                results[i] = e
+    return results
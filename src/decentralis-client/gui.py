@@ -1,6 +1,8 @@
 import tkinter as tk
-from tkinter import ttk, messagebox, filedialog, simpledialog
+from tkinter import ttk, messagebox, filedialog
 import threading
+import queue
+import concurrent.futures
 import secrets
 import os
 import sys
@@ -8,6 +10,15 @@ import asyncio
 import uuid
 
 from connection.connection import connection
+from crypto import resolve_algorithm
+
+# Intervalle de lecture de peer_queue: 200 ms, doublé tant que rien ne change (max 5 s)
+PEERS_POLL_MIN_MS = 200
+PEERS_POLL_MAX_MS = 5000
+# Intervalle de vérification des futures de la boucle asyncio depuis le thread Tk
+FUTURE_POLL_MS = 50
+# Délai max de connexion TCP au tracker (secondes)
+TRACKER_CONNECT_TIMEOUT = 5.0
 
 
 def get_app_dir():
@@ -22,10 +33,17 @@ def get_app_dir():
     else:
         # Exécuté en mode script
         return os.path.dirname(os.path.abspath(__file__))
+
+
+# Répertoires de données, calculés une seule fois à l'import
+_APP_DIR = get_app_dir()
+_CONFIG_DIR = os.path.join(_APP_DIR, 'data')
+_STORAGE_DIR = os.path.join(_CONFIG_DIR, 'storage')
 from views.peers_view import PeersView
 from views.files_view import FilesView
 from views.encryption_view import EncryptionView
 from views.p2p_view import P2PView
+from views.passphrase_dialog import PassphraseDialog
 
 # Import du module chunking
 try:
@@ -36,6 +54,22 @@ except ImportError as e:
     CHUNKING_AVAILABLE = False
 
 
+def _ensure_dir(path: str) -> None:
+    """Crée le dossier s'il manque; un seul stat quand il existe déjà."""
+    if not os.path.isdir(path):
+        os.makedirs(path, exist_ok=True)
+
+
+def _is_valid_port_input(value: str) -> bool:
+    """validatecommand Tk: accepte un entier 1-65535 ou un champ vide."""
+    return value == '' or (value.isdigit() and 0 < int(value) < 65536)
+
+
+def _is_valid_keepalive_input(value: str) -> bool:
+    """validatecommand Tk: accepte un intervalle 1-3600 secondes ou un champ vide."""
+    return value == '' or (value.isdigit() and 0 < int(value) <= 3600)
+
+
 class DecentralisGUI:
     def __init__(self, root):
         self.root = root
@@ -48,13 +82,19 @@ class DecentralisGUI:
         header = ttk.Frame(root, padding=8)
         header.grid(row=0, column=0, sticky='ew')
 
+        # Validation à la saisie: seuls des ports 1-65535 et un keepalive 1-3600 s
+        # (ou un champ vide en cours d'édition) peuvent être tapés
+        port_vcmd = (root.register(_is_valid_port_input), '%P')
+        keepalive_vcmd = (root.register(_is_valid_keepalive_input), '%P')
+
         ttk.Label(header, text="Tracker IP:").grid(row=0, column=0, sticky='e')
         self.srv_ip = tk.StringVar(value="127.0.0.1")
         ttk.Entry(header, textvariable=self.srv_ip, width=18).grid(row=0, column=1, sticky='w')
 
         ttk.Label(header, text="Tracker Port:").grid(row=0, column=2, sticky='e')
         self.srv_port = tk.IntVar(value=5000)
-        ttk.Entry(header, textvariable=self.srv_port, width=8).grid(row=0, column=3, sticky='w')
+        ttk.Spinbox(header, from_=1, to=65535, textvariable=self.srv_port, width=8,
+                    validate='key', validatecommand=port_vcmd).grid(row=0, column=3, sticky='w')
 
         ttk.Label(header, text="Peer IP:").grid(row=1, column=0, sticky='e')
         self.peer_ip = tk.StringVar(value="127.0.0.1")
@@ -62,11 +102,13 @@ class DecentralisGUI:
 
         ttk.Label(header, text="Peer Port:").grid(row=1, column=2, sticky='e')
         self.peer_port = tk.IntVar(value=6000)
-        ttk.Entry(header, textvariable=self.peer_port, width=8).grid(row=1, column=3, sticky='w')
+        ttk.Spinbox(header, from_=1, to=65535, textvariable=self.peer_port, width=8,
+                    validate='key', validatecommand=port_vcmd).grid(row=1, column=3, sticky='w')
 
         ttk.Label(header, text="Keepalive (s):").grid(row=2, column=0, sticky='e')
         self.keepalive = tk.IntVar(value=15)
-        ttk.Entry(header, textvariable=self.keepalive, width=8).grid(row=2, column=1, sticky='w')
+        ttk.Spinbox(header, from_=1, to=3600, textvariable=self.keepalive, width=8,
+                    validate='key', validatecommand=keepalive_vcmd).grid(row=2, column=1, sticky='w')
 
         self.connect_btn = ttk.Button(header, text="Connexion", command=self._on_connect_click)
         self.connect_btn.grid(row=2, column=2, columnspan=2)
@@ -88,13 +130,27 @@ class DecentralisGUI:
         container.columnconfigure(0, weight=1)
         container.rowconfigure(0, weight=1)
 
-        # Frames for each view (now provided by separate modules)
+        # Frames for each view (now provided by separate modules).
+        # Les vues sont construites à la première demande (get_view/show_view)
+        self._container = container
+        self._view_factories = {
+            'peers': PeersView,
+            'files': FilesView,
+            'encryption': EncryptionView,
+            'p2p': P2PView,
+        }
         self.frames = {}
+        self._current_view = None
+        # Dernière liste de pairs reçue (affichée à la création de la vue Pairs)
+        self._last_peers = []
+        # Barre de progression de restauration (créée à la demande)
+        self._restore_frame = None
+        self._restore_progress = None
         # storage directory for files (relative to executable for portability)
-        self.config_dir = os.path.join(get_app_dir(), 'data')
-        os.makedirs(self.config_dir, exist_ok=True)
-        self.storage_dir = os.path.join(self.config_dir, 'storage')
-        os.makedirs(self.storage_dir, exist_ok=True)
+        self.config_dir = _CONFIG_DIR
+        self.storage_dir = _STORAGE_DIR
+        # Crée aussi config_dir (parent)
+        _ensure_dir(self.storage_dir)
         # chemin pour persister l'identité du peer
         self.peer_id_path = os.path.join(self.config_dir, 'peer_uuid.txt')
         # retention (key) file path
@@ -102,51 +158,103 @@ class DecentralisGUI:
         # encryption settings object (cached for the session)
         self.encryption_settings = {}
         self._cached_passphrase = None
+        # Pool pour les appels réseau bloquants (hors du thread Tk)
+        self._exec = concurrent.futures.ThreadPoolExecutor(max_workers=2)
+        # Boucle asyncio unique pour toute la session (thread dédié)
+        self._aio_loop = asyncio.new_event_loop()
+        self._aio_thread = threading.Thread(target=self._aio_loop.run_forever, daemon=True)
+        self._aio_thread.start()
         
         # Chunking P2P manager
         self.chunking_mgr = None
+        # Fin d'initialisation du chunking reçue avant la fin de __init__
+        # (boucle Tk imbriquée du dialogue de passphrase)
+        self._startup_done = False
+        self._pending_chunking_fut = None
         self._peer_uuid = self._load_or_create_peer_uuid()
-        self._init_chunking()
-
-        self.frames['peers'] = PeersView(container, self)
-        self.frames['peers'].grid(row=0, column=0, sticky='nsew')
-
-        self.frames['encryption'] = EncryptionView(container, self)
-        self.frames['encryption'].grid(row=0, column=0, sticky='nsew')
+        # Ouverture de la base et création du manager hors du thread Tk
+        self._start_chunking_init()
 
         # If a retention file already exists, prompt for passphrase now so it's cached
-        # before views are used. If no retention file exists, we'll create frames first
-        # and then force creation/import via _ensure_retention_file below.
+        # before views are used. If no retention file exists, the encryption view is
+        # built on demand to force creation/import via _ensure_retention_file below.
         try:
             self._ensure_retention_file()
         except Exception as e:
             messagebox.showerror('Erreur', f'Erreur initialisation clé: {e}')
 
-        self.frames['files'] = FilesView(container, self)
-        self.frames['files'].grid(row=0, column=0, sticky='nsew')
-
-        # Vue P2P
-        self.frames['p2p'] = P2PView(container, self)
-        self.frames['p2p'].grid(row=0, column=0, sticky='nsew')
-
-        # Vérifier et restaurer container.dat si nécessaire
-        self._check_and_restore_container()
-
         self.show_view('files')
 
         # connection state
         self.conn = None
         self._updating = False
+        self._poll_interval_ms = PEERS_POLL_MIN_MS
+        self._peers_after_id = None
         
         # Bind cleanup on window close
         root.protocol("WM_DELETE_WINDOW", self._on_close)
 
-    def _init_chunking(self):
-        """Initialise le système de chunking P2P."""
+        self._startup_done = True
+        if self._pending_chunking_fut is not None:
+            self.root.after(0, self._on_chunking_ready, self._pending_chunking_fut)
+
+    def _start_chunking_init(self):
+        """Lance l'initialisation du chunking sur la boucle asyncio de la session.
+
+        La fenêtre s'affiche sans attendre la base SQLite; _on_chunking_ready
+        prend le relais dans le thread Tk.
+        """
         if not CHUNKING_AVAILABLE:
             print("Module chunking non disponible")
             return
-        
+
+        async def build():
+            # Construit sur le thread de la boucle: les objets asyncio du
+            # manager y sont rattachés
+            self._init_chunking()
+            return self.chunking_mgr
+
+        self.chunking_mgr = None
+        fut = self.run_coroutine(build())
+        self._when_done(fut, self._on_chunking_ready)
+
+    def _on_chunking_ready(self, fut: concurrent.futures.Future):
+        """Callback (thread Tk) une fois le ChunkingManager créé."""
+        if not self._startup_done:
+            # Clé et état de connexion pas encore prêts: reporter à la fin de __init__
+            self._pending_chunking_fut = fut
+            return
+        self._pending_chunking_fut = None
+        if fut.exception() is not None or self.chunking_mgr is None:
+            return
+
+        # Connexion établie pendant l'initialisation: brancher le manager maintenant
+        if self.conn:
+            try:
+                peer_ip = self.peer_ip.get()
+                peer_port = self.peer_port.get()
+                self.chunking_mgr.set_connection_handler(self.conn, peer_ip, peer_port)
+                print(f"[Chunking] Connection handler mis à jour: {peer_ip}:{peer_port}")
+                self.get_view('p2p')._start_server()
+            except Exception as e:
+                print(f"[Erreur] Impossible de démarrer le serveur P2P: {e}")
+
+        # Vérifier et restaurer container.dat si nécessaire, une fois la fenêtre
+        # dessinée (la question éventuelle arrive après le premier affichage)
+        self.root.after_idle(self._check_and_restore_container)
+
+        for name in ('files', 'p2p'):
+            view = self.frames.get(name)
+            try:
+                if name == 'files' and view is not None:
+                    view.refresh()
+                elif name == 'p2p' and view is not None:
+                    view._refresh_local()
+            except Exception as e:
+                print(f"[Chunking] Erreur rafraîchissement vue {name}: {e}")
+
+    def _init_chunking(self):
+        """Initialise le système de chunking P2P."""
         try:
             # Chemins pour le chunking
             chunks_dir = os.path.join(self.config_dir, 'chunks')
@@ -182,8 +290,9 @@ class DecentralisGUI:
         chunks_dir = os.path.join(self.config_dir, 'chunks')
         try:
             if os.path.isdir(chunks_dir):
-                entries = [d for d in os.listdir(chunks_dir)
-                           if os.path.isdir(os.path.join(chunks_dir, d))]
+                # is_dir() de scandir utilise le type lu avec l'entrée: pas de stat
+                with os.scandir(chunks_dir) as it:
+                    entries = [e.name for e in it if e.is_dir()]
                 if entries:
                     existing = entries[0]
                     # Valider vaguement le format UUID (presence des tirets)
@@ -225,15 +334,14 @@ class DecentralisGUI:
         
         # Vérifier si on a des chunks du container dans notre base
         try:
+            # Notre container en priorité, sinon celui d'un autre propriétaire
+            # (au cas où), en une seule requête
             metadata = self.chunking_mgr.db.get_file_metadata_by_name(
                 'container.dat', 
-                self._peer_uuid
+                self._peer_uuid,
+                fallback_any=True
             )
             
-            if not metadata:
-                # Chercher aussi sans filtre de propriétaire (au cas où)
-                metadata = self.chunking_mgr.db.get_file_metadata_by_name('container.dat')
-            
             if not metadata:
                 print("[Container] Aucun container.dat chunké trouvé en base")
                 return
@@ -243,6 +351,10 @@ class DecentralisGUI:
                 print("[Container] Clé de chiffrement non disponible pour restauration")
                 return
             
+            # Fenêtre fermée entre-temps: ne rien afficher
+            if not self._root_alive():
+                return
+
             # Afficher un dialogue de confirmation
             answer = messagebox.askyesno(
                 'Restauration du conteneur',
@@ -259,6 +371,37 @@ class DecentralisGUI:
         except Exception as e:
             print(f"[Container] Erreur vérification: {e}")
 
+    def run_coroutine(self, coro) -> concurrent.futures.Future:
+        """Planifie une coroutine sur la boucle asyncio de la session.
+
+        Returns:
+            Future thread-safe (concurrent.futures) du résultat
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self._aio_loop)
+
+    def _when_done(self, fut: concurrent.futures.Future, callback, *args):
+        """Appelle callback(fut, *args) dans le thread Tk une fois fut terminé.
+
+        Le suivi est planifié depuis le thread Tk avec after(): un done-callback
+        s'exécuterait sur le thread de la boucle asyncio, et Tk refuse les appels
+        venant d'un autre thread tant que mainloop() n'a pas démarré (dialogue
+        de passphrase ouvert pendant __init__).
+        """
+        def poll():
+            if fut.done():
+                callback(fut, *args)
+            elif self._root_alive():
+                self.root.after(FUTURE_POLL_MS, poll)
+
+        self.root.after(FUTURE_POLL_MS, poll)
+
+    def _root_alive(self) -> bool:
+        """Indique si la fenêtre principale existe encore."""
+        try:
+            return bool(self.root.winfo_exists())
+        except tk.TclError:
+            return False
+
     def _restore_container_async(self, file_uuid: str, owner_uuid: str, output_path: str):
         """
         Restaure le container.dat de manière asynchrone.
@@ -268,39 +411,52 @@ class DecentralisGUI:
             owner_uuid: UUID du propriétaire
             output_path: Chemin de sortie pour le container restauré
         """
-        def do_restore():
-            try:
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                
-                # Afficher une fenêtre de progression
-                self.root.after(0, lambda: messagebox.showinfo(
-                    'Restauration',
-                    'Restauration du container.dat en cours...\n'
-                    'Cela peut prendre quelques instants.'
-                ))
-                
-                # Tenter la reconstruction
-                reconstructed_data = loop.run_until_complete(
-                    self.chunking_mgr.reconstruct_file(file_uuid, owner_uuid, output_path)
-                )
-                
-                loop.close()
-                
-                # Succès
-                self.root.after(0, lambda: self._on_container_restored(output_path))
-                
-            except Exception as e:
-                error_msg = str(e)
-                self.root.after(0, lambda: messagebox.showerror(
-                    'Erreur de restauration',
-                    f'Impossible de restaurer container.dat:\n{error_msg}\n\n'
-                    'Il manque peut-être des chunks sur les pairs.'
-                ))
-                print(f"[Container] Erreur restauration: {e}")
+        # Barre de progression non modale sous les vues (l'interface reste utilisable)
+        self._show_restore_progress()
+
+        # Tenter la reconstruction sur la boucle partagée; le résultat est
+        # traité dans le thread Tk
+        fut = self.run_coroutine(
+            self.chunking_mgr.reconstruct_file(file_uuid, owner_uuid, output_path)
+        )
+        self._when_done(fut, self._on_restore_done, output_path)
+
+    def _show_restore_progress(self):
+        """Affiche la barre de progression (indéterminée) de la restauration."""
+        if self._restore_frame is None:
+            self._restore_frame = ttk.Frame(self.root, padding=(8, 0, 8, 8))
+            self._restore_frame.columnconfigure(1, weight=1)
+            ttk.Label(self._restore_frame, text='Restauration du container.dat en cours...').grid(
+                row=0, column=0, sticky='w', padx=(0, 8))
+            self._restore_progress = ttk.Progressbar(self._restore_frame, mode='indeterminate')
+            self._restore_progress.grid(row=0, column=1, sticky='ew')
+        self._restore_frame.grid(row=2, column=0, sticky='ew')
+        self._restore_progress.start(50)
+
+    def _hide_restore_progress(self):
+        if self._restore_frame is not None:
+            self._restore_progress.stop()
+            self._restore_frame.grid_remove()
+
+    def _on_restore_done(self, fut: concurrent.futures.Future, output_path: str):
+        """
+        Callback (thread Tk) appelé à la fin de la reconstruction du container.
         
-        thread = threading.Thread(target=do_restore, daemon=True)
-        thread.start()
+        Args:
+            fut: Future de reconstruct_file
+            output_path: Chemin du container restauré
+        """
+        self._hide_restore_progress()
+        error = fut.exception()
+        if error is None:
+            self._on_container_restored(output_path)
+            return
+        print(f"[Container] Erreur restauration: {error}")
+        messagebox.showerror(
+            'Erreur de restauration',
+            f'Impossible de restaurer container.dat:\n{error}\n\n'
+            'Il manque peut-être des chunks sur les pairs.'
+        )
 
     def _on_container_restored(self, container_path: str):
         """
@@ -325,6 +481,9 @@ class DecentralisGUI:
     def _on_close(self):
         """Gère la fermeture propre de l'application."""
         try:
+            # Aucun callback after() ne doit survivre à root.destroy()
+            self._updating = False
+            self._cancel_peers_poll()
             # Fermer la connexion au tracker
             if self.conn:
                 try:
@@ -335,13 +494,13 @@ class DecentralisGUI:
             # Arrêter le ChunkingManager
             if self.chunking_mgr:
                 try:
-                    # Créer une boucle asyncio pour shutdown
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-                    loop.run_until_complete(self.chunking_mgr.shutdown())
-                    loop.close()
+                    self.run_coroutine(self.chunking_mgr.shutdown()).result(timeout=5)
                 except:
                     pass
+            self._exec.shutdown(wait=False)
+            # Arrêter la boucle asyncio de la session
+            self._aio_loop.call_soon_threadsafe(self._aio_loop.stop)
+            self._aio_thread.join(timeout=2)
         finally:
             self.root.destroy()
 
@@ -349,13 +508,22 @@ class DecentralisGUI:
     # view creation is now delegated to separate view classes in files under views/
 
     # --- View switching ---
+    def get_view(self, name):
+        """Retourne la vue demandée, construite à son premier accès."""
+        frame = self.frames.get(name)
+        if frame is None:
+            frame = self._view_factories[name](self._container, self)
+            frame.grid(row=0, column=0, sticky='nsew')
+            self.frames[name] = frame
+            if name == 'peers' and self._last_peers:
+                frame.update_peers(self._last_peers)
+        return frame
+
     def show_view(self, name):
-        for k, f in self.frames.items():
-            if k == name:
-                f.lift()
-                f.tkraise()
-            else:
-                f.lower()
+        # Toutes les vues partagent la même cellule: remonter la vue demandée
+        # suffit, inutile de réordonner les autres (un seul appel Tk)
+        self.get_view(name).tkraise()
+        self._current_view = name
 
     # --- Connection handling (unchanged logic) ---
     def _on_connect_click(self):
@@ -363,41 +531,57 @@ class DecentralisGUI:
             self._disconnect()
             return
 
+        # Les champs numériques sont validés à la saisie; seul un champ laissé
+        # vide fait échouer IntVar.get()
         try:
-            srv_ip = self.srv_ip.get()
-            srv_port = int(self.srv_port.get())
-            peer_ip = self.peer_ip.get()
-            peer_port = int(self.peer_port.get())
-            keepalive = int(self.keepalive.get())
-        except Exception as e:
-            messagebox.showerror("Erreur", f"Valeurs invalides: {e}")
+            srv_port = self.srv_port.get()
+            peer_port = self.peer_port.get()
+            keepalive = self.keepalive.get()
+        except tk.TclError:
+            messagebox.showerror("Erreur", "Valeurs invalides: champ numérique vide")
             return
+        srv_ip = self.srv_ip.get()
+        peer_ip = self.peer_ip.get()
 
         def create_conn():
             try:
-                self.conn = connection(srv_ip, srv_port, peer_ip, peer_port, keepalive)
+                # Keepalive planifié sur la boucle partagée (pas de thread par connexion)
+                self.conn = connection(srv_ip, srv_port, peer_ip, peer_port, keepalive,
+                                       loop=self._aio_loop,
+                                       connect_timeout=TRACKER_CONNECT_TIMEOUT)
                 # Mettre à jour le ChunkingManager avec le connection handler
                 if self.chunking_mgr and self.conn:
                     self.chunking_mgr.set_connection_handler(self.conn, peer_ip, peer_port)
                     print(f"[Chunking] Connection handler mis à jour: {peer_ip}:{peer_port}")
                     
-                    # Démarrer le serveur P2P automatiquement
-                    try:
-                        p2p_view = self.frames.get('p2p') if hasattr(self, 'frames') else None
-                        if p2p_view and hasattr(p2p_view, '_start_server'):
-                            self.root.after(500, p2p_view._start_server)
-                    except Exception as e:
-                        print(f"[Erreur] Impossible de démarrer le serveur P2P: {e}")
+                    # Démarrer le serveur P2P automatiquement (vue créée si besoin,
+                    # depuis le thread Tk)
+                    def start_server():
+                        try:
+                            self.get_view('p2p')._start_server()
+                        except Exception as e:
+                            print(f"[Erreur] Impossible de démarrer le serveur P2P: {e}")
+                    self.root.after(500, start_server)
             except Exception as e:
+                # Le constructeur propage les erreurs réseau de l'annonce
+                # initiale (tracker injoignable, délai dépassé)
                 self.conn = None
-                self.root.after(0, lambda: messagebox.showerror("Erreur de connexion", str(e)))
+                if isinstance(e, OSError):
+                    error_msg = f"Tracker injoignable ({srv_ip}:{srv_port}): {e}"
+                else:
+                    error_msg = str(e)
+                self.root.after(0, lambda: messagebox.showerror("Erreur de connexion", error_msg))
+                # Remettre le bouton et le polling dans l'état déconnecté
+                self.root.after(0, self._disconnect)
 
         t = threading.Thread(target=create_conn, daemon=True)
         t.start()
 
         self.connect_btn.config(text="Déconnexion")
         self._updating = True
-        self.root.after(1000, self._update_peers)
+        self._poll_interval_ms = PEERS_POLL_MIN_MS
+        self._cancel_peers_poll()
+        self._peers_after_id = self.root.after(1000, self._update_peers)
 
     def _disconnect(self):
         try:
@@ -412,55 +596,98 @@ class DecentralisGUI:
                 self.chunking_mgr.set_connection_handler(None)
         finally:
             self._updating = False
+            self._cancel_peers_poll()
+            self._last_peers = []
             # clear peers view listbox if present
             try:
-                if 'peers' in self.frames and hasattr(self.frames['peers'], 'listbox'):
-                    self.frames['peers'].listbox.delete(0, tk.END)
+                if 'peers' in self.frames and hasattr(self.frames['peers'], 'clear'):
+                    self.frames['peers'].clear()
             except Exception:
                 pass
             self.connect_btn.config(text="Connexion")
 
     def _update_peers(self):
+        self._peers_after_id = None
         if not self._updating:
             return
+        changed = False
         try:
-            if self.conn:
-                resp = self.conn.get_peers()
-                peers = resp.get('peers', []) if isinstance(resp, dict) else []
-            else:
-                peers = []
-            # Delegate update to peers view
+            # Les réponses getpeers sont poussées par la boucle keepalive de la
+            # connexion: aucune requête réseau depuis le thread Tk
+            if not self.conn:
+                return
+            try:
+                resp = self.conn.peer_queue.get_nowait()
+            except queue.Empty:
+                return
+            peers = resp.get('peers', []) if isinstance(resp, dict) else []
+            changed = peers != self._last_peers
+            self._last_peers = peers
+            # Delegate update to peers view (si elle a déjà été construite)
             try:
                 if 'peers' in self.frames and hasattr(self.frames['peers'], 'update_peers'):
-                    self.frames['peers'].update_peers(peers)
+                    changed = bool(self.frames['peers'].update_peers(peers))
             except Exception as e:
                 print('Erreur mise à jour view peers:', e)
         except Exception as e:
             print("Erreur récupération pairs:", e)
         finally:
-            self.root.after(2000, self._update_peers)
+            # Recul exponentiel tant que la liste ne change pas
+            if changed:
+                self._poll_interval_ms = PEERS_POLL_MIN_MS
+            else:
+                self._poll_interval_ms = min(self._poll_interval_ms * 2, PEERS_POLL_MAX_MS)
+            if self._updating:
+                self._peers_after_id = self.root.after(self._poll_interval_ms, self._update_peers)
+
+    def reset_peers_poll(self):
+        """Revient à l'intervalle minimal (action utilisateur) et relit peer_queue bientôt."""
+        if not self._updating:
+            return
+        self._poll_interval_ms = PEERS_POLL_MIN_MS
+        self._cancel_peers_poll()
+        self._peers_after_id = self.root.after(self._poll_interval_ms, self._update_peers)
+
+    def _cancel_peers_poll(self):
+        """Annule la prochaine lecture de peer_queue si elle est planifiée."""
+        if self._peers_after_id is not None:
+            try:
+                self.root.after_cancel(self._peers_after_id)
+            except tk.TclError:
+                pass
+            self._peers_after_id = None
     
     def _ensure_retention_file(self):
         """Ensure a retention JSON exists; if yes prompt for passphrase; if not force create/import."""
-        from keystore import verify_passphrase_and_get_keyhex, load_retention
-
-        if os.path.exists(self.retention_path):
-            # ask for passphrase and derive key
-            for _ in range(3):
-                p = simpledialog.askstring('Passphrase', 'Entrez la passphrase pour la clé de rétention:', show='*')
-                if p is None:
-                    # user cancelled
-                    break
-                try:
-                    keyhex = verify_passphrase_and_get_keyhex(self.retention_path, p)
-                    data = load_retention(self.retention_path)
-                    self.encryption_settings = {'algorithm': data.get('algorithm', 'AES-256'), 'key': keyhex}
-                    # cache passphrase for this session
-                    self._cached_passphrase = p
-                    return True
-                except Exception as e:
-                    messagebox.showerror('Erreur', f'Passphrase incorrecte: {e}')
-            raise RuntimeError('Passphrase non fournie ou incorrecte')
+        from keystore import verify_passphrase_and_get_key, load_retention
+
+        try:
+            # Un seul stat pour l'existence; load_retention ne reparse que si le mtime change
+            os.stat(self.retention_path)
+            has_retention = True
+        except OSError:
+            has_retention = False
+
+        if has_retention:
+            # ask for passphrase and derive key: une seule fenêtre, 3 essais,
+            # erreur affichée dans la fenêtre
+            dialog = PassphraseDialog(
+                self.root,
+                on_submit=lambda p: verify_passphrase_and_get_key(self.retention_path, p),
+                max_attempts=3
+            )
+            self.root.wait_window(dialog)
+            if dialog.result is None:
+                raise RuntimeError('Passphrase non fournie ou incorrecte')
+            p, key = dialog.result
+            data = load_retention(self.retention_path)
+            # Fichiers sans algorithme: AES-256 (défaut historique); 'auto': selon le CPU
+            algorithm = resolve_algorithm(data.get('algorithm', 'AES-256'))
+            # Clé brute: pas d'aller-retour hex à chaque chiffrement
+            self.encryption_settings = {'algorithm': algorithm, 'key': key}
+            # cache passphrase for this session
+            self._cached_passphrase = p
+            return True
         else:
             # force create or import
             ans = messagebox.askyesno('Clé manquante', 'Aucun fichier de rétention trouvé. Voulez-vous en créer un maintenant ? (Oui = créer, Non = importer)')
@@ -468,13 +695,13 @@ class DecentralisGUI:
                 # create using Encryption view helper
                 self.show_view('encryption')
                 try:
-                    self.frames['encryption'].create_retention()
+                    self.get_view('encryption').create_retention()
                 except Exception as e:
                     raise
             else:
                 self.show_view('encryption')
                 try:
-                    self.frames['encryption'].import_retention()
+                    self.get_view('encryption').import_retention()
                 except Exception as e:
                     raise
             # after create/import, recall to prompt passphrase
@@ -1,22 +1,71 @@
 import os
 import json
-from typing import Dict
+import hashlib
+from functools import lru_cache
+from typing import Dict, Tuple
 
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
-from cryptography.hazmat.primitives import hashes
+# orjson (optionnel) parse/sérialise directement des bytes, nettement plus vite que json
+try:
+    import orjson
+
+    def _loads(data: bytes):
+        return orjson.loads(data)
+
+    def _dumps(payload) -> bytes:
+        return orjson.dumps(payload)
+except ImportError:
+    def _loads(data: bytes):
+        return json.loads(data)
+
+    def _dumps(payload) -> bytes:
+        return json.dumps(payload).encode('utf-8')
+
+from cryptography.exceptions import InvalidTag
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 
 
+@lru_cache(maxsize=8)
+def _derive_key_bytes(passphrase: str, salt_hex: str, iterations: int) -> bytes:
+    # hashlib.pbkdf2_hmac appelle directement OpenSSL (même résultat que PBKDF2HMAC).
+    # Mémoïsé: une même saisie n'est pas redérivée (200k itérations) au sein de la session.
+    return hashlib.pbkdf2_hmac('sha256', passphrase.encode('utf-8'), bytes.fromhex(salt_hex), iterations, dklen=32)
+
+
+@lru_cache(maxsize=4)
+def _aesgcm(key: bytes) -> AESGCM:
+    # Un seul objet AESGCM (contexte OpenSSL) par clé; sans état entre appels
+    return AESGCM(key)
+
+
+def derive_key(passphrase: str, salt_hex: str, iterations: int = 200000) -> bytes:
+    return _derive_key_bytes(passphrase, salt_hex, int(iterations))
+
+
 def derive_key_hex(passphrase: str, salt_hex: str, iterations: int = 200000) -> str:
-    salt = bytes.fromhex(salt_hex)
-    kdf = PBKDF2HMAC(algorithm=hashes.SHA256(), length=32, salt=salt, iterations=iterations)
-    key = kdf.derive(passphrase.encode('utf-8'))
-    return key.hex()
+    return derive_key(passphrase, salt_hex, iterations).hex()
+
+
+def clear_key_cache() -> None:
+    """Oublie les passphrases et clés mémoïsées (à appeler quand l'utilisateur oublie sa passphrase)."""
+    _derive_key_bytes.cache_clear()
+    _aesgcm.cache_clear()
+
+
+# Cache des fichiers de rétention déjà parsés: path -> ((mtime_ns, size), data)
+_retention_cache: Dict[str, Tuple[Tuple[int, int], Dict]] = {}
 
 
 def load_retention(path: str) -> Dict:
-    with open(path, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    """Charge un fichier de rétention; le parse n'est refait que si le fichier a changé."""
+    st = os.stat(path)
+    stamp = (st.st_mtime_ns, st.st_size)
+    cached = _retention_cache.get(path)
+    if cached is not None and cached[0] == stamp:
+        return dict(cached[1])
+    with open(path, 'rb') as f:
+        data = _loads(f.read())
+    _retention_cache[path] = (stamp, data)
+    return dict(data)
 
 
 def generate_retention_file(path: str, passphrase: str, iterations: int = 200000, algorithm: str = 'AES-256') -> None:
@@ -29,11 +78,10 @@ def generate_retention_file(path: str, passphrase: str, iterations: int = 200000
 
     salt = os.urandom(16)
     salt_hex = salt.hex()
-    key_hex = derive_key_hex(passphrase, salt_hex, iterations)
-    key = bytes.fromhex(key_hex)
+    key = derive_key(passphrase, salt_hex, iterations)
 
     # verification: encrypt a short known plaintext with AES-GCM using derived key
-    aesgcm = AESGCM(key)
+    aesgcm = _aesgcm(key)
     nonce = os.urandom(12)
     ct = aesgcm.encrypt(nonce, b'decentralis-verification', None)
     verify = (nonce + ct).hex()
@@ -47,21 +95,28 @@ def generate_retention_file(path: str, passphrase: str, iterations: int = 200000
         'verify': verify,
     }
 
-    # write atomically
+    # write atomically: contenu synchronisé sur disque avant le rename, lisible
+    # par le seul propriétaire (0o600)
     tmp = path + '.tmp'
-    with open(tmp, 'w', encoding='utf-8') as f:
-        json.dump(payload, f)
+    data = _dumps(payload)
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0), 0o600)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+        os.fsync(fd)
+    finally:
+        os.close(fd)
     os.replace(tmp, path)
 
 
-def verify_passphrase_and_get_keyhex(path: str, passphrase: str) -> str:
+def verify_passphrase_and_get_key(path: str, passphrase: str) -> bytes:
+    """Vérifie la passphrase et retourne la clé brute (32 octets)."""
     data = load_retention(path)
     salt = data.get('salt')
     iterations = int(data.get('iterations', 200000))
-    algorithm = data.get('algorithm', 'AES-256')
 
-    key_hex = derive_key_hex(passphrase, salt, iterations)
-    key = bytes.fromhex(key_hex)
+    key = derive_key(passphrase, salt, iterations)
 
     # verify by decrypting verify blob
     verify_hex = data.get('verify')
@@ -70,12 +125,19 @@ def verify_passphrase_and_get_keyhex(path: str, passphrase: str) -> str:
     blob = bytes.fromhex(verify_hex)
     nonce = blob[:12]
     ct = blob[12:]
-    aesgcm = AESGCM(key)
-    pt = aesgcm.decrypt(nonce, ct, None)
-    if pt != b'decentralis-verification':
-        raise ValueError('Passphrase incorrecte')
+    aesgcm = _aesgcm(key)
+    # Le tag GCM authentifie le blob: une mauvaise clé lève InvalidTag,
+    # aucune comparaison du clair n'est nécessaire
+    try:
+        aesgcm.decrypt(nonce, ct, None)
+    except InvalidTag:
+        raise ValueError('Passphrase incorrecte') from None
+
+    return key
 
-    return key_hex
+
+def verify_passphrase_and_get_keyhex(path: str, passphrase: str) -> str:
+    return verify_passphrase_and_get_key(path, passphrase).hex()
 
 
 def export_retention(src_path: str, dst_path: str) -> None:
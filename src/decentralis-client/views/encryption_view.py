@@ -5,6 +5,7 @@ import os
 import shutil
 
 import keystore
+import crypto
 
 
 class EncryptionView(ttk.Frame):
@@ -15,8 +16,8 @@ class EncryptionView(ttk.Frame):
         ttk.Label(self, text='Paramètres de chiffrement', font=('TkDefaultFont', 11, 'bold')).grid(row=0, column=0, columnspan=2, pady=(0,8))
 
         ttk.Label(self, text='Algorithme:').grid(row=1, column=0, sticky='e')
-        self.algo_var = tk.StringVar(value='AES-256')
-        ttk.Combobox(self, textvariable=self.algo_var, values=['AES-256', 'ChaCha20'], state='readonly').grid(row=1, column=1, sticky='w')
+        self.algo_var = tk.StringVar(value='auto')
+        ttk.Combobox(self, textvariable=self.algo_var, values=['auto', 'AES-256', 'ChaCha20'], state='readonly').grid(row=1, column=1, sticky='w')
 
         ttk.Label(self, text='Passphrase:').grid(row=2, column=0, sticky='e')
         self.passphrase_var = tk.StringVar()
@@ -84,7 +85,9 @@ class EncryptionView(ttk.Frame):
 
         path = os.path.join(self.app_gui.config_dir, 'key.json')
         try:
-            keystore.generate_retention_file(path, p1, iterations=200000, algorithm=self.algo_var.get())
+            # 'auto' est résolu maintenant pour que le fichier reste lisible sur un autre CPU
+            algorithm = crypto.resolve_algorithm(self.algo_var.get())
+            keystore.generate_retention_file(path, p1, iterations=200000, algorithm=algorithm)
             messagebox.showinfo('Succès', f'Fichier de rétention créé: {path}')
         except Exception as e:
             messagebox.showerror('Erreur', f'Echec création: {e}')
@@ -125,9 +128,10 @@ class EncryptionView(ttk.Frame):
             messagebox.showerror('Erreur', 'Aucun fichier de rétention trouvé, créez ou importez-en un first')
             return
         try:
-            keyhex = keystore.verify_passphrase_and_get_keyhex(path, p)
+            key = keystore.verify_passphrase_and_get_key(path, p)
             data = keystore.load_retention(path)
-            self.app_gui.encryption_settings = {'algorithm': data.get('algorithm', 'AES-256'), 'key': keyhex}
+            algorithm = crypto.resolve_algorithm(data.get('algorithm', 'AES-256'))
+            self.app_gui.encryption_settings = {'algorithm': algorithm, 'key': key}
             # cache passphrase
             self.app_gui._cached_passphrase = p
             messagebox.showinfo('Succès', 'Passphrase appliquée en mémoire')
@@ -167,6 +171,9 @@ class EncryptionView(ttk.Frame):
         if hasattr(self.app_gui, '_cached_passphrase'):
             delattr(self.app_gui, '_cached_passphrase')
         self.app_gui.encryption_settings = {}
+        # Les caches de dérivation gardent passphrase et clé en mémoire: les vider aussi
+        keystore.clear_key_cache()
+        crypto.clear_key_cache()
         self.status_var.set('Passphrase oubliée')
         try:
             self.pass_entry.state(['!disabled'])
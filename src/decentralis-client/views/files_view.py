@@ -3,14 +3,38 @@ from tkinter import ttk, filedialog, messagebox, simpledialog
 import os
 import shutil
 import json
-import base64
+import binascii
 import tempfile
 import asyncio
 import threading
 import hashlib
+from concurrent.futures import ThreadPoolExecutor
 
 import crypto
 
+# Volume max de containers en clair gardés en mémoire avant de chiffrer le lot
+UPLOAD_BATCH_BYTES = 256 * 1024 * 1024
+
+
+def _pack_container(header: dict, data: bytes) -> bytes:
+    """Sérialise un container en clair: en-tête JSON sur une ligne, puis les
+    octets bruts du fichier (plus de base64 ni d'échappement JSON du contenu)."""
+    return b''.join((json.dumps(header).encode('ascii'), b'\n', data))
+
+
+def _unpack_container(plain: bytes):
+    """Retourne (en-tête, données) d'un container en clair.
+
+    Accepte aussi l'ancien format (un seul objet JSON, contenu en base64 sous
+    la clé 'data'): json.dumps n'émet jamais de saut de ligne, donc l'en-tête
+    se termine au premier '\\n' dans les deux formats.
+    """
+    header_line, _, data = plain.partition(b'\n')
+    header = json.loads(header_line)
+    if 'data' in header:
+        data = binascii.a2b_base64(header.pop('data'))
+    return header, data
+
 
 class FilesView(ttk.Frame):
     """
@@ -26,10 +50,15 @@ class FilesView(ttk.Frame):
     def __init__(self, parent, app_gui, **kwargs):
         super().__init__(parent, **kwargs)
         self.app_gui = app_gui
-        self.cwd = ''  # virtual path ('' = root)
+        self._cwd_parts = ()  # virtual path as segments (() = root)
         self.container = {'entries': {}}  # in-memory arborescence (dossiers + file_uuid)
+        self._tree = self._new_node()  # Index arborescent (trie) de container['entries']
         self._file_uuids = {}  # Mapping: logical_path -> file_uuid
         self._progress = {}  # Tracking: logical_path -> {'phase': str, 'percent': int}
+        self._displayed_rows = None  # Lignes (chemin, texte, tag) affichées par refresh()
+        self._container_version = None  # (base, version file_metadata) de l'arborescence chargée
+        # E/S disque lourdes (déchiffrement, extraction) hors du thread Tk
+        self._io_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix='files-io')
 
         # toolbar
         toolbar = ttk.Frame(self)
@@ -73,10 +102,39 @@ class FilesView(ttk.Frame):
 
         self.refresh()
 
+    @property
+    def cwd(self) -> str:
+        """Chemin logique du dossier courant ('' = racine)."""
+        return '/'.join(self._cwd_parts)
+
+    def _key(self, *names: str) -> str:
+        """Chemin logique d'un élément du dossier courant.
+
+        Les segments sont joints directement par '/': pas d'os.path.join ni de
+        normalisation des séparateurs Windows à chaque action.
+        """
+        return '/'.join(self._cwd_parts + names)
+
     def get_container_path(self, file_uuid: str) -> str:
         """Chemin du container pour un fichier spécifique."""
         return os.path.join(self.app_gui.storage_dir, f'{file_uuid}.dat')
 
+    def _remove_container(self, file_uuid: str) -> None:
+        """Supprime le container local d'un fichier s'il existe (EAFP: un seul
+        appel système au lieu d'un exists() suivi d'un remove())."""
+        try:
+            os.remove(self.get_container_path(file_uuid))
+        except FileNotFoundError:
+            pass
+
+    def _list_local_containers(self) -> set:
+        """Noms des fichiers containers (.dat) présents dans le stockage local."""
+        try:
+            with os.scandir(self.app_gui.storage_dir) as it:
+                return {e.name for e in it if e.name.endswith('.dat')}
+        except OSError:
+            return set()
+
     def _update_progress(self, logical_path: str, phase: str, percent: int):
         """Met à jour la progression d'un fichier et rafraîchit l'affichage."""
         self._progress[logical_path] = {'phase': phase, 'percent': percent}
@@ -111,22 +169,19 @@ class FilesView(ttk.Frame):
 
     def _refresh_item_display(self, logical_path: str):
         """Rafraîchit l'affichage d'un item dans la TreeView avec la progression."""
-        # Chercher l'item correspondant
-        for item in self.file_tree.get_children(''):
-            item_text = self.file_tree.item(item, 'text')
-            # Nettoyer le texte du précédent affichage de progression
-            base_name = item_text.split(' [')[0] if ' [' in item_text else item_text
-            
-            # Reconstruire le chemin logique
-            keypath = os.path.join(self.cwd, base_name.rstrip('/')) if self.cwd else base_name.rstrip('/')
-            keypath = keypath.replace('\\', '/')
-            
-            if keypath == logical_path:
-                # Mettre à jour le texte avec la progression
-                progress_text = self._get_progress_text(logical_path)
-                new_text = base_name + ' ' + progress_text if progress_text else base_name
-                self.file_tree.item(item, text=new_text)
-                break
+        # Les items ont leur chemin logique pour identifiant: accès direct,
+        # sans relire le texte de toutes les lignes
+        if not self.file_tree.exists(logical_path):
+            return
+        item_text = self.file_tree.item(logical_path, 'text')
+        # Nettoyer le texte du précédent affichage de progression
+        base_name = item_text.split(' [')[0] if ' [' in item_text else item_text
+        
+        # Mettre à jour le texte avec la progression
+        progress_text = self._get_progress_text(logical_path)
+        new_text = base_name + ' ' + progress_text if progress_text else base_name
+        self.file_tree.item(logical_path, text=new_text)
+        self._displayed_rows = None  # Affichage modifié hors de refresh()
 
     def load_container(self):
         """
@@ -135,7 +190,14 @@ class FilesView(ttk.Frame):
         """
         mgr = getattr(self.app_gui, 'chunking_mgr', None)
         if not mgr:
-            self.container = {'entries': {}}
+            self._reset_container()
+            self._container_version = None
+            return True
+        
+        # Table file_metadata inchangée depuis le dernier chargement: garder
+        # l'arborescence en mémoire (évite une requête par fichier)
+        version = (id(mgr.db), mgr.db.file_metadata_version)
+        if version == self._container_version:
             return True
         
         try:
@@ -143,7 +205,7 @@ class FilesView(ttk.Frame):
             all_files = mgr.db.get_all_file_metadata()
             
             # Reconstruire l'arborescence
-            self.container = {'entries': {}}
+            self._reset_container()
             self._file_uuids = {}
             
             for file_meta in all_files:
@@ -158,18 +220,113 @@ class FilesView(ttk.Frame):
                 self._add_to_entries(file_path, file_uuid)
                 self._file_uuids[file_path] = file_uuid
             
+            self._container_version = version
             return True
         except Exception as e:
             print(f"Erreur load_container: {e}")
-            self.container = {'entries': {}}
+            self._reset_container()
+            self._container_version = None
             return False
 
     def _add_to_entries(self, file_path: str, file_uuid: str):
         """Ajoute un fichier à l'arborescence (structure plate avec chemins logiques)."""
         # Stocker directement avec le chemin logique comme clé
-        self.container['entries'][file_path] = {'type': 'file', 'file_uuid': file_uuid}
+        self._set_entry(file_path, {'type': 'file', 'file_uuid': file_uuid})
         self._file_uuids[file_path] = file_uuid
 
+    # ------------------------------------------------------------------
+    # Index arborescent des entrées
+    # ------------------------------------------------------------------
+    # container['entries'] reste un dict plat {chemin logique: entrée}; le trie
+    # self._tree le double pour lister un dossier sans parcourir toutes les clés.
+    # Nœud: {'entry': entrée ou None (dossier intermédiaire), 'children': {nom: nœud}}
+
+    @staticmethod
+    def _new_node() -> dict:
+        return {'entry': None, 'children': {}}
+
+    def _reset_container(self):
+        """Vide l'arborescence en mémoire et son index."""
+        self.container = {'entries': {}}
+        self._tree = self._new_node()
+
+    def _tree_node(self, path: str):
+        """Retourne le nœud du trie pour un chemin logique ('' = racine), ou None."""
+        node = self._tree
+        if path:
+            for part in path.split('/'):
+                node = node['children'].get(part)
+                if node is None:
+                    return None
+        return node
+
+    def _set_entry(self, path: str, entry: dict):
+        """Ajoute ou remplace une entrée dans container['entries'] et dans le trie."""
+        self.container.setdefault('entries', {})[path] = entry
+        node = self._tree
+        for part in path.split('/'):
+            child = node['children'].get(part)
+            if child is None:
+                child = node['children'][part] = self._new_node()
+            node = child
+        node['entry'] = entry
+
+    def _iter_subtree(self, path: str):
+        """Itère (chemin, entrée) sur tout le contenu d'un dossier, récursivement.
+
+        Ne visite que le sous-arbre concerné, sans parcourir toutes les clés.
+        """
+        node = self._tree_node(path)
+        if node is None:
+            return
+        stack = [(path, node)]
+        while stack:
+            base, node = stack.pop()
+            for name, child in node['children'].items():
+                key = base + '/' + name if base else name
+                if child['entry'] is not None:
+                    yield key, child['entry']
+                if child['children']:
+                    stack.append((key, child))
+
+    def _iter_subtree_files(self, path: str):
+        """Itère (chemin, file_uuid) sur les fichiers d'un dossier, récursivement."""
+        for key, entry in self._iter_subtree(path):
+            if entry.get('type') == 'file' and entry.get('file_uuid'):
+                yield key, entry['file_uuid']
+
+    def _drop_subtree(self, path: str):
+        """Retire d'un bloc tout le contenu d'un dossier (l'entrée du dossier,
+        si elle existe, est conservée)."""
+        node = self._tree_node(path)
+        if node is None:
+            return
+        entries = self.container.setdefault('entries', {})
+        for key, _ in self._iter_subtree(path):
+            entries.pop(key, None)
+        node['children'] = {}
+        if node['entry'] is None:
+            # Dossier intermédiaire devenu vide: l'élaguer
+            self._remove_entry(path)
+
+    def _remove_entry(self, path: str):
+        """Retire une entrée; les dossiers intermédiaires devenus vides disparaissent."""
+        self.container.setdefault('entries', {}).pop(path, None)
+        parts = path.split('/')
+        nodes = [self._tree]
+        for part in parts:
+            child = nodes[-1]['children'].get(part)
+            if child is None:
+                return
+            nodes.append(child)
+        nodes[-1]['entry'] = None
+        # Élaguer en remontant tant que les nœuds sont vides
+        for i in range(len(parts) - 1, -1, -1):
+            node = nodes[i + 1]
+            if node['entry'] is not None or node['children']:
+                break
+            del nodes[i]['children'][parts[i]]
+
     def save_container(self):
         """
         Sauvegarde chaque fichier individuellement.
@@ -197,30 +354,30 @@ class FilesView(ttk.Frame):
         
         # S'assurer qu'on a une structure
         if not hasattr(self, 'container') or self.container is None:
-            self.container = {'entries': {}}
+            self._reset_container()
 
-        # Afficher le répertoire courant
-        prefix = (self.cwd + '/') if self.cwd else ''
+        # Afficher le répertoire courant: enfants directs du nœud cwd dans le trie
+        cwd = self.cwd
+        prefix = cwd + '/' if cwd else ''
+        node = self._tree_node(cwd)
         children = {}
         
-        for key in self.container.get('entries', {}).keys():
-            if not key.startswith(prefix):
-                continue
-            rest = key[len(prefix):]
-            if '/' in rest:
-                # C'est un dossier intermédiaire
-                name = rest.split('/', 1)[0]
+        for name, child in (node['children'].items() if node else ()):
+            if child['children'] or child['entry'] is None:
+                # C'est un dossier (explicite ou intermédiaire)
                 children[name] = {'type': 'dir'}
             else:
-                # C'est un fichier dans le répertoire courant
-                entry = self.container['entries'][key]
-                children[rest] = entry
+                # C'est un fichier (ou dossier vide) dans le répertoire courant
+                children[name] = child['entry']
 
         # Trier: dossiers d'abord
         items = sorted(children.items(), key=lambda kv: (kv[1].get('type') != 'dir', kv[0].lower()))
 
-        self.file_tree.delete(*self.file_tree.get_children())
+        # Containers présents localement: une seule lecture du dossier
+        # (scandir) plutôt qu'un stat par fichier affiché
+        local_containers = self._list_local_containers()
         
+        rows = []
         for name, info in items:
             is_dir = info.get('type') == 'dir'
             display = name + ('/' if is_dir else '')
@@ -232,29 +389,33 @@ class FilesView(ttk.Frame):
                 # Vérifier si le fichier a un container local
                 file_uuid = info.get('file_uuid', '')
                 if file_uuid:
-                    container_file = self.get_container_path(file_uuid)
-                    tag = 'available' if os.path.exists(container_file) else 'needs_rebuild'
+                    tag = 'available' if f'{file_uuid}.dat' in local_containers else 'needs_rebuild'
                 else:
                     tag = 'available'
             
             # Ajouter la progression si applicable
-            keypath = os.path.join(self.cwd, name.rstrip('/')) if self.cwd else name.rstrip('/')
-            keypath = keypath.replace('\\', '/')
+            keypath = prefix + name
             progress_text = self._get_progress_text(keypath)
             if progress_text:
                 display = display + ' ' + progress_text
-            
-            self.file_tree.insert('', 'end', text=display, values=(tag,), tags=(tag,))
+            rows.append((keypath, display, tag))
+
+        # Chaque appel au Treeview traverse l'interpréteur Tcl: ne rien refaire
+        # si l'affichage est inchangé (la sélection est aussi conservée)
+        if rows != self._displayed_rows:
+            self.file_tree.delete(*self.file_tree.get_children())
+            insert = self.file_tree.insert
+            for keypath, display, tag in rows:
+                insert('', 'end', iid=keypath, text=display, values=(tag,), tags=(tag,))
+            self._displayed_rows = rows
 
-        rel = '/' + self.cwd if self.cwd else '/'
+        rel = '/' + cwd
         self.path_var.set(f'Storage: {rel}')
 
     def go_up(self):
-        if not self.cwd:
+        if not self._cwd_parts:
             return
-        self.cwd = os.path.dirname(self.cwd)
-        if self.cwd == '.':
-            self.cwd = ''
+        self._cwd_parts = self._cwd_parts[:-1]
         self.refresh()
 
     def enter_selected(self):
@@ -265,21 +426,22 @@ class FilesView(ttk.Frame):
         name = item['text']
         if name.endswith('/'):
             name = name[:-1]
-            self.cwd = os.path.join(self.cwd, name) if self.cwd else name
-            self.cwd = self.cwd.replace('\\', '/')
+            self._cwd_parts += (name,)
             self.refresh()
 
     def new_folder(self):
         name = simpledialog.askstring('Nouveau dossier', 'Nom du dossier:')
         if not name:
             return
-        key = os.path.join(self.cwd, name) if self.cwd else name
-        key = key.replace('\\', '/')
+        key = self._key(name)
         entries = self.container.setdefault('entries', {})
         if key in entries and entries[key].get('type') == 'dir':
             messagebox.showerror('Erreur', 'Le dossier existe déjà')
             return
-        entries[key] = {'type': 'dir'}
+        self._set_entry(key, {'type': 'dir'})
+        # Les dossiers vides ne sont pas en BD: invalider le cache pour que
+        # refresh() recharge toujours l'arborescence, comme avant le cache
+        self._container_version = None
         if self.save_container():
             self.refresh()
 
@@ -343,25 +505,13 @@ class FilesView(ttk.Frame):
             messagebox.showerror('Erreur', 'ChunkingManager non disponible')
             return
 
-        count = 0
+        # Chaque fichier uplodé crée son propre container; chemins logiques
+        # fixés ici (le cwd peut changer pendant le chiffrement)
+        jobs = []
         for file_path in paths:
-            try:
-                # Chaque fichier uplodé crée son propre container
-                self._upload_single_file(file_path, algo, key, mgr)
-                count += 1
-            except Exception as e:
-                messagebox.showwarning('Avertissement', f'Impossible d\'uploader {os.path.basename(file_path)}: {e}')
-        
-        if count > 0:
-            messagebox.showinfo('Upload', f'{count} fichier(s) uploadé(s)')
-            self.refresh()
-            # Rafraîchir P2P
-            try:
-                p2p_view = self.app_gui.frames.get('p2p') if hasattr(self.app_gui, 'frames') else None
-                if p2p_view and hasattr(p2p_view, '_refresh_local'):
-                    self.after(0, p2p_view._refresh_local)
-            except Exception:
-                pass
+            jobs.append((file_path, self._key(os.path.basename(file_path))))
+
+        self._start_upload(jobs, algo, key, mgr, lambda count: f'{count} fichier(s) uploadé(s)')
 
     def upload_directory(self):
         """Upload un dossier entier - chaque fichier devient un container indépendant."""
@@ -381,8 +531,8 @@ class FilesView(ttk.Frame):
             messagebox.showerror('Erreur', 'ChunkingManager non disponible')
             return
 
-        count = 0
         folder_name = os.path.basename(dir_path)
+        jobs = []
         
         # Parcourir récursivement
         for root, dirs, files in os.walk(dir_path):
@@ -390,28 +540,101 @@ class FilesView(ttk.Frame):
             for dir_name in dirs:
                 abs_dir = os.path.join(root, dir_name)
                 rel_path = os.path.relpath(abs_dir, dir_path)
-                logical_path = os.path.join(self.cwd, folder_name, rel_path) if self.cwd else os.path.join(folder_name, rel_path)
-                logical_path = logical_path.replace('\\', '/')
-                entries = self.container.setdefault('entries', {})
-                if logical_path not in entries:
-                    entries[logical_path] = {'type': 'dir'}
+                logical_path = self._key(folder_name, rel_path.replace(os.sep, '/'))
+                if logical_path not in self.container.setdefault('entries', {}):
+                    self._set_entry(logical_path, {'type': 'dir'})
             
             # Uploader chaque fichier
             for file_name in files:
                 abs_file = os.path.join(root, file_name)
                 rel_path = os.path.relpath(abs_file, dir_path)
-                logical_path = os.path.join(self.cwd, folder_name, rel_path) if self.cwd else os.path.join(folder_name, rel_path)
-                logical_path = logical_path.replace('\\', '/')
-                
-                try:
-                    self._upload_single_file(abs_file, algo, key, mgr, logical_path)
-                    count += 1
-                except Exception as e:
-                    messagebox.showwarning('Avertissement', f'Impossible d\'uploader {file_name}: {e}')
-        
+                logical_path = self._key(folder_name, rel_path.replace(os.sep, '/'))
+                jobs.append((abs_file, logical_path))
+
+        self._start_upload(jobs, algo, key, mgr,
+                           lambda count: f'Dossier "{folder_name}" uploadé avec {count} fichier(s)')
+
+    def _start_upload(self, jobs: list, algo: str, key: str, mgr, done_message):
+        """Lance lecture et chiffrement des fichiers dans le pool d'E/S.
+
+        jobs: liste de (chemin du fichier, chemin logique). Les containers sont
+        publiés ensuite sur le thread Tk par _on_upload_encrypted.
+        """
+        if not jobs:
+            return
+        self.configure(cursor='watch')
+        fut = self._io_pool.submit(self._prepare_and_encrypt, jobs, algo, key)
+        fut.add_done_callback(lambda f: self.after(0, self._on_upload_encrypted, f, mgr, done_message))
+
+    def _prepare_and_encrypt(self, jobs: list, algo: str, key: str) -> list:
+        """Construit les containers en mémoire puis les chiffre par lots
+        (threads de crypto.encrypt_files). Exécuté dans le pool d'E/S.
+
+        Returns:
+            Liste de (container préparé ou None, nom du fichier, erreur ou None)
+        """
+        results = []
+        prepared = []
+        pending = 0
+        for file_path, logical_path in jobs:
+            try:
+                item = self._prepare_upload(file_path, logical_path)
+            except Exception as e:
+                results.append((None, os.path.basename(file_path), e))
+                continue
+            prepared.append(item)
+            pending += len(item['plain'])
+            if pending >= UPLOAD_BATCH_BYTES:
+                results.extend(self._encrypt_batch(prepared, algo, key))
+                prepared = []
+                pending = 0
+        results.extend(self._encrypt_batch(prepared, algo, key))
+        return results
+
+    @staticmethod
+    def _encrypt_batch(prepared: list, algo: str, key: str) -> list:
+        """Chiffre un lot de containers préparés vers leurs fichiers temporaires.
+
+        Appelé depuis un thread du pool d'E/S: crypto.encrypt_files n'utilise
+        que des threads (aucun fork depuis ce processus multi-threadé).
+        """
+        if not prepared:
+            return []
+        try:
+            errors = crypto.encrypt_files([(p['plain'], p['tmp_path']) for p in prepared], key, algorithm=algo)
+        except Exception as e:
+            errors = [e] * len(prepared)
+        finally:
+            # Libérer le clair dès qu'il est chiffré
+            for p in prepared:
+                p.pop('plain', None)
+        return [(p, p['filename'], err) for p, err in zip(prepared, errors)]
+
+    def _on_upload_encrypted(self, fut, mgr, done_message):
+        """Publie les containers chiffrés (thread Tk): arborescence, BD, chunking."""
+        self.configure(cursor='')
+        try:
+            results = fut.result()
+        except Exception as e:
+            messagebox.showerror('Erreur', f'Echec upload: {e}')
+            return
+
+        count = 0
+        for p, filename, err in results:
+            try:
+                if err is not None:
+                    raise err
+                self._finish_upload(p, mgr)
+                count += 1
+            except Exception as e:
+                if p is not None:
+                    self._discard_tmp(p)
+                messagebox.showwarning('Avertissement', f'Impossible d\'uploader {filename}: {e}')
+
         if count > 0:
-            messagebox.showinfo('Upload', f'Dossier "{folder_name}" uploadé avec {count} fichier(s)')
+            messagebox.showinfo('Upload', done_message(count))
             self.refresh()
+            # Rafraîchir P2P
             try:
                 p2p_view = self.app_gui.frames.get('p2p') if hasattr(self.app_gui, 'frames') else None
                 if p2p_view and hasattr(p2p_view, '_refresh_local'):
@@ -419,15 +642,15 @@ class FilesView(ttk.Frame):
             except Exception:
                 pass
 
-    def _upload_single_file(self, file_path: str, algo: str, key: str, mgr, logical_path: str = None):
+    def _prepare_upload(self, file_path: str, logical_path: str = None) -> dict:
         """
-        Upload un fichier unique.
-        Crée son container individuel et l'enregistre en BD.
+        Construit en mémoire le container en clair d'un fichier (chiffré ensuite
+        par l'appelant, sans fichier temporaire en clair sur disque).
+        Retourne les informations nécessaires au chiffrement puis à _finish_upload.
         """
         if logical_path is None:
             name = os.path.basename(file_path)
-            logical_path = os.path.join(self.cwd, name) if self.cwd else name
-            logical_path = logical_path.replace('\\', '/')
+            logical_path = self._key(name)
         
         # Lire le fichier
         with open(file_path, 'rb') as f:
@@ -437,28 +660,37 @@ class FilesView(ttk.Frame):
         import uuid
         file_uuid = str(uuid.uuid4())
         
-        # Créer le container pour ce fichier (JSON simple)
-        container = {'file_uuid': file_uuid, 'original_filename': os.path.basename(file_path), 'data': base64.b64encode(data).decode('ascii')}
+        # Créer le container pour ce fichier (en-tête JSON + contenu brut)
+        header = {'file_uuid': file_uuid, 'original_filename': os.path.basename(file_path), 'size': len(data)}
         
-        # Chiffrer et sauvegarder
+        # Container sérialisé, chiffré ensuite par l'appelant
         container_path = self.get_container_path(file_uuid)
-        tmp = None
-        try:
-            fd, tmp = tempfile.mkstemp(prefix='enc_file_', suffix='.json')
-            os.close(fd)
-            with open(tmp, 'w', encoding='utf-8') as f:
-                json.dump(container, f)
-            crypto.encrypt_file(tmp, container_path, key, algorithm=algo)
-        finally:
-            try:
-                if tmp and os.path.exists(tmp):
-                    os.remove(tmp)
-            except Exception:
-                pass
-        
+        plain = _pack_container(header, data)
+
+        return {
+            'file_uuid': file_uuid,
+            'filename': os.path.basename(file_path),
+            'logical_path': logical_path,
+            'plain': plain,
+            'container_path': container_path,
+            # Chiffré d'abord à côté du container, puis renommé par _finish_upload
+            'tmp_path': container_path + '.tmp',
+            'original_hash': hashlib.sha256(data).hexdigest(),
+            'original_size': len(data),
+        }
+
+    def _finish_upload(self, prepared: dict, mgr):
+        """Enregistre un container chiffré (arborescence, BD) puis lance le chunking."""
+        file_uuid = prepared['file_uuid']
+        logical_path = prepared['logical_path']
+        container_path = prepared['container_path']
+
+        # Publication atomique (même dossier, même système de fichiers): un
+        # container tronqué par une interruption n'apparaît jamais comme disponible
+        os.replace(prepared['tmp_path'], container_path)
+
         # Ajouter à l'arborescence en mémoire
-        entries = self.container.setdefault('entries', {})
-        entries[logical_path] = {'type': 'file', 'file_uuid': file_uuid}
+        self._set_entry(logical_path, {'type': 'file', 'file_uuid': file_uuid})
         self._file_uuids[logical_path] = file_uuid
         
         # Enregistrer les métadonnées en BD
@@ -468,10 +700,10 @@ class FilesView(ttk.Frame):
         metadata = ChunkMetadata(
             file_uuid=file_uuid,
             owner_uuid=owner_uuid,
-            original_filename=os.path.basename(file_path),
+            original_filename=prepared['filename'],
             file_path=logical_path,
-            original_hash=hashlib.sha256(data).hexdigest(),
-            original_size=len(data),
+            original_hash=prepared['original_hash'],
+            original_size=prepared['original_size'],
             total_chunks=0,  # Sera mis à jour lors du chunking
             data_chunks=0,
             parity_chunks=0,
@@ -487,6 +719,14 @@ class FilesView(ttk.Frame):
         # Chunker et distribuer automatiquement le fichier
         self._auto_chunk_and_distribute(file_uuid, container_path, mgr, logical_path)
 
+    @staticmethod
+    def _discard_tmp(prepared: dict):
+        """Supprime le chiffré temporaire d'un upload échoué."""
+        try:
+            os.remove(prepared['tmp_path'])
+        except OSError:
+            pass
+
     def _auto_chunk_and_distribute(self, old_file_uuid: str, container_path: str, mgr, logical_path: str):
         """Chunke et distribue automatiquement un fichier après upload."""
         import asyncio
@@ -613,8 +853,7 @@ class FilesView(ttk.Frame):
         name = item['text']
         is_dir = name.endswith('/')
         
-        selected_path = os.path.join(self.cwd, name.rstrip('/')) if self.cwd else name.rstrip('/')
-        selected_path = selected_path.replace('\\', '/')
+        selected_path = self._key(name.rstrip('/'))
         
         if not messagebox.askyesno('Confirmer', 
             f'Forcer le rechunking et l\'envoi des chunks?\n\n'
@@ -716,7 +955,6 @@ class FilesView(ttk.Frame):
 
     def _force_resync_directory_recursive(self, dir_path: str):
         """Force le rechunking et l'envoi pour tous les fichiers dans un dossier récursivement."""
-        prefix = dir_path + '/'
         mgr = getattr(self.app_gui, 'chunking_mgr', None)
         owner_uuid = getattr(self.app_gui, '_peer_uuid', 'local')
         settings = getattr(self.app_gui, 'encryption_settings', None) or {}
@@ -726,29 +964,26 @@ class FilesView(ttk.Frame):
         if not mgr or not algo or not key:
             raise Exception('Configuration incomplète')
         
-        for path, entry in self.container.get('entries', {}).items():
-            if path.startswith(prefix) and entry.get('type') == 'file':
-                file_uuid = entry.get('file_uuid')
-                if file_uuid:
-                    container_path = self.get_container_path(file_uuid)
-                    container_exists = os.path.exists(container_path)
-                    
-                    # Vérifier si des chunks existent
-                    try:
-                        chunks = mgr.store.list_chunks(owner_uuid, file_uuid)
-                        has_chunks = len(chunks) > 0
-                    except:
-                        has_chunks = False
-                    
-                    if container_exists:
-                        # Container existe → rechunker
-                        self._auto_chunk_and_distribute(file_uuid, container_path, mgr, path)
-                    elif has_chunks:
-                        # Chunks existent mais pas container → redistribuer
-                        self._force_redistribute(file_uuid, owner_uuid, mgr, path)
-                    else:
-                        # Ni container ni chunks → ignorer et continuer
-                        print(f"[Force-Resync-Dir] Ignoré {path}: ni container ni chunks")
+        for path, file_uuid in list(self._iter_subtree_files(dir_path)):
+            container_path = self.get_container_path(file_uuid)
+            container_exists = os.path.exists(container_path)
+            
+            # Vérifier si des chunks existent
+            try:
+                chunks = mgr.store.list_chunks(owner_uuid, file_uuid)
+                has_chunks = len(chunks) > 0
+            except:
+                has_chunks = False
+            
+            if container_exists:
+                # Container existe → rechunker
+                self._auto_chunk_and_distribute(file_uuid, container_path, mgr, path)
+            elif has_chunks:
+                # Chunks existent mais pas container → redistribuer
+                self._force_redistribute(file_uuid, owner_uuid, mgr, path)
+            else:
+                # Ni container ni chunks → ignorer et continuer
+                print(f"[Force-Resync-Dir] Ignoré {path}: ni container ni chunks")
 
     def delete_local_file(self):
         """
@@ -765,8 +1000,7 @@ class FilesView(ttk.Frame):
         name = item['text']
         is_dir = name.endswith('/')
         
-        selected_path = os.path.join(self.cwd, name.rstrip('/')) if self.cwd else name.rstrip('/')
-        selected_path = selected_path.replace('\\', '/')
+        selected_path = self._key(name.rstrip('/'))
         
         mgr = getattr(self.app_gui, 'chunking_mgr', None)
         owner_uuid = getattr(self.app_gui, '_peer_uuid', 'local')
@@ -777,13 +1011,7 @@ class FilesView(ttk.Frame):
         
         # Vérifier que des chunks ont été distribués
         if is_dir:
-            prefix = selected_path + '/'
-            files_to_check = []
-            for path, entry in self.container.get('entries', {}).items():
-                if path.startswith(prefix) and entry.get('type') == 'file':
-                    file_uuid = entry.get('file_uuid')
-                    if file_uuid:
-                        files_to_check.append((path, file_uuid))
+            files_to_check = list(self._iter_subtree_files(selected_path))
             
             if not files_to_check:
                 messagebox.showinfo('Info', 'Aucun fichier dans ce dossier')
@@ -824,9 +1052,7 @@ class FilesView(ttk.Frame):
                 messagebox.showinfo('Succès', f'{count} fichier(s) supprimé(s) localement.')
             else:
                 # Supprimer container de ce fichier
-                container_path = self.get_container_path(file_uuid)
-                if os.path.exists(container_path):
-                    os.remove(container_path)
+                self._remove_container(file_uuid)
                 messagebox.showinfo('Succès', 'Fichier supprimé localement.')
             
             self.refresh()
@@ -835,20 +1061,14 @@ class FilesView(ttk.Frame):
 
     def _delete_local_directory_recursive(self, dir_path: str) -> int:
         """Supprime containers de tous les fichiers dans un dossier récursivement."""
-        prefix = dir_path + '/'
         count = 0
         
-        for path, entry in self.container.get('entries', {}).items():
-            if path.startswith(prefix) and entry.get('type') == 'file':
-                file_uuid = entry.get('file_uuid')
-                if file_uuid:
-                    container_path = self.get_container_path(file_uuid)
-                    try:
-                        if os.path.exists(container_path):
-                            os.remove(container_path)
-                        count += 1
-                    except Exception:
-                        pass
+        for _, file_uuid in self._iter_subtree_files(dir_path):
+            try:
+                self._remove_container(file_uuid)
+                count += 1
+            except Exception:
+                pass
         
         return count
 
@@ -869,8 +1089,7 @@ class FilesView(ttk.Frame):
         name = item['text']
         is_dir = name.endswith('/')
         
-        selected_path = os.path.join(self.cwd, name.rstrip('/')) if self.cwd else name.rstrip('/')
-        selected_path = selected_path.replace('\\', '/')
+        selected_path = self._key(name.rstrip('/'))
         
         if not messagebox.askyesno('ATTENTION', 
             f'Supprimer définitivement {name}?\n\n'
@@ -896,14 +1115,10 @@ class FilesView(ttk.Frame):
                         self._delete_chunks_from_peers(file_uuid, owner_uuid, chunking_mgr)
                     
                     # Supprimer du container en mémoire
-                    entries = self.container.setdefault('entries', {})
-                    if selected_path in entries:
-                        del entries[selected_path]
+                    self._remove_entry(selected_path)
                     
                     # Supprimer container local
-                    container_path = self.get_container_path(file_uuid)
-                    if os.path.exists(container_path):
-                        os.remove(container_path)
+                    self._remove_container(file_uuid)
                     
                     # Supprimer de la BD
                     if chunking_mgr:
@@ -920,44 +1135,31 @@ class FilesView(ttk.Frame):
 
     def _delete_permanent_directory_recursive(self, dir_path: str, chunking_mgr) -> int:
         """Supprime définitivement tous les fichiers dans un dossier récursivement."""
-        prefix = dir_path + '/'
-        entries = self.container.setdefault('entries', {})
         count = 0
-        to_delete = []
         owner_uuid = getattr(self.app_gui, 'peer_uuid', None)
         
-        for path, entry in entries.items():
-            if path.startswith(prefix):
-                if entry.get('type') == 'file':
-                    file_uuid = entry.get('file_uuid')
-                    if file_uuid:
-                        # Demander la suppression des chunks aux pairs distants
-                        if chunking_mgr and owner_uuid:
-                            self._delete_chunks_from_peers(file_uuid, owner_uuid, chunking_mgr)
-                        
-                        # Supprimer container
-                        container_path = self.get_container_path(file_uuid)
-                        try:
-                            if os.path.exists(container_path):
-                                os.remove(container_path)
-                        except Exception:
-                            pass
-                        
-                        # Supprimer de la BD
-                        if chunking_mgr:
-                            try:
-                                chunking_mgr.db.delete_file_metadata(file_uuid)
-                            except Exception:
-                                pass
-                        
-                        count += 1
-                
-                to_delete.append(path)
+        for _, file_uuid in self._iter_subtree_files(dir_path):
+            # Demander la suppression des chunks aux pairs distants
+            if chunking_mgr and owner_uuid:
+                self._delete_chunks_from_peers(file_uuid, owner_uuid, chunking_mgr)
+            
+            # Supprimer container
+            try:
+                self._remove_container(file_uuid)
+            except Exception:
+                pass
+            
+            # Supprimer de la BD
+            if chunking_mgr:
+                try:
+                    chunking_mgr.db.delete_file_metadata(file_uuid)
+                except Exception:
+                    pass
+            
+            count += 1
         
-        # Supprimer de l'arborescence
-        for path in to_delete:
-            if path in entries:
-                del entries[path]
+        # Supprimer de l'arborescence: le sous-arbre entier d'un coup
+        self._drop_subtree(dir_path)
         
         return count
 
@@ -1041,8 +1243,7 @@ class FilesView(ttk.Frame):
         name = item['text']
         
         # Construire le chemin logique sélectionné
-        selected_path = os.path.join(self.cwd, name.rstrip('/')) if self.cwd else name.rstrip('/')
-        selected_path = selected_path.replace('\\', '/')
+        selected_path = self._key(name.rstrip('/'))
         
         is_dir = name.endswith('/')
         
@@ -1065,15 +1266,8 @@ class FilesView(ttk.Frame):
 
     def _rebuild_directory_recursive(self, dir_path: str, chunking_mgr):
         """Rebuild récursivement tous les fichiers dans un dossier."""
-        prefix = dir_path + '/'
-        files_to_rebuild = []
-        
         # Trouver tous les fichiers dans ce dossier (récursivement)
-        for path, entry in self.container.get('entries', {}).items():
-            if path.startswith(prefix) and entry.get('type') == 'file':
-                file_uuid = entry.get('file_uuid')
-                if file_uuid:
-                    files_to_rebuild.append((path, file_uuid))
+        files_to_rebuild = list(self._iter_subtree_files(dir_path))
         
         if not files_to_rebuild:
             messagebox.showinfo('Info', 'Aucun fichier à rebuilder dans ce dossier')
@@ -1149,8 +1343,7 @@ class FilesView(ttk.Frame):
         
         # Construire le chemin logique
         rel_name = name
-        keypath = os.path.join(self.cwd, rel_name) if self.cwd else rel_name
-        keypath = keypath.replace('\\', '/')
+        keypath = self._key(rel_name)
         
         # Récupérer le file_uuid
         file_uuid = self._file_uuids.get(keypath)
@@ -1158,55 +1351,53 @@ class FilesView(ttk.Frame):
             messagebox.showerror('Erreur', 'Fichier introuvable dans l\'arborescence')
             return
         
-        # Vérifier que le container existe
+        # Container absent: signalé par _on_extract_done (pas de stat préalable)
         container_path = self.get_container_path(file_uuid)
-        if not os.path.exists(container_path):
-            messagebox.showerror('Erreur', 'Conteneur indisponible. Reconstruisez-le d\'abord.')
+        
+        settings = getattr(self.app_gui, 'encryption_settings', None) or {}
+        key = settings.get('key')
+        algo = settings.get('algorithm')
+        if not key or not algo:
+            messagebox.showerror('Erreur', 'Clé de chiffrement non configurée')
             return
         
+        # Déchiffrement et extraction dans le pool d'E/S: l'interface reste
+        # réactive pendant le traitement des gros fichiers
+        self.configure(cursor='watch')
+        fut = self._io_pool.submit(self._extract_container, container_path, key, algo, rel_name)
+        fut.add_done_callback(lambda f: self.after(0, self._on_extract_done, f))
+
+    def _on_extract_done(self, fut):
+        """Ouvre le fichier extrait (thread Tk) ou affiche l'erreur."""
+        self.configure(cursor='')
         try:
-            # Déchiffrer le container
-            settings = getattr(self.app_gui, 'encryption_settings', None) or {}
-            key = settings.get('key')
-            algo = settings.get('algorithm')
-            if not key or not algo:
-                messagebox.showerror('Erreur', 'Clé de chiffrement non configurée')
-                return
-            
-            import crypto
-            fd, tmp = tempfile.mkstemp(prefix='dec_', suffix='.json')
-            os.close(fd)
-            
-            try:
-                # Déchiffrer
-                crypto.decrypt_file(container_path, tmp, key, algorithm=algo)
-                
-                # Lire le JSON
-                with open(tmp, 'r', encoding='utf-8') as f:
-                    container = json.load(f)
-                
-                # Extraire les données
-                b64 = container.get('data', '')
-                data = base64.b64decode(b64)
-                original_filename = container.get('original_filename', rel_name)
-                
-                # Créer un dossier temporaire pour ce fichier
-                temp_dir = tempfile.mkdtemp(prefix='decentralis_open_')
-                temp_file = os.path.join(temp_dir, original_filename)
-                
-                with open(temp_file, 'wb') as f:
-                    f.write(data)
-                
-                # Ouvrir le fichier avec l'application par défaut
-                os.startfile(temp_file)
-                
-            finally:
-                if tmp and os.path.exists(tmp):
-                    try:
-                        os.remove(tmp)
-                    except Exception:
-                        pass
-            
+            # Ouvrir le fichier avec l'application par défaut
+            os.startfile(fut.result())
+        except FileNotFoundError:
+            messagebox.showerror('Erreur', 'Conteneur indisponible. Reconstruisez-le d\'abord.')
         except Exception as e:
             messagebox.showerror('Erreur', f"Impossible d'ouvrir le fichier: {e}")
 
+    @staticmethod
+    def _extract_container(container_path: str, key: str, algo: str, rel_name: str) -> str:
+        """Déchiffre un container en mémoire et écrit son contenu dans un dossier temporaire.
+        
+        Exécuté dans le pool d'E/S. Retourne le chemin du fichier extrait.
+        """
+        # Déchiffrer sans fichier intermédiaire (le clair du container ne
+        # touche le disque qu'une fois, sous son nom d'origine)
+        with open(container_path, 'rb') as f:
+            plain = crypto.decrypt_bytes(f.read(), key, algorithm=algo)
+        
+        # Extraire les données
+        header, data = _unpack_container(plain)
+        original_filename = header.get('original_filename', rel_name)
+        
+        # Créer un dossier temporaire pour ce fichier
+        temp_dir = tempfile.mkdtemp(prefix='decentralis_open_')
+        temp_file = os.path.join(temp_dir, original_filename)
+        
+        with open(temp_file, 'wb') as f:
+            f.write(data)
+        return temp_file
+
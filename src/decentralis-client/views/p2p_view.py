@@ -132,6 +132,7 @@ class P2PView(ttk.Frame):
         self._server_running = False
         self._async_loop = None
         self._local_files = {}  # file_uuid -> metadata
+        self._peers_inflight = False  # Requête get_peers des stats en cours
         
         # Rafraîchir à l'initialisation
         self.after(500, self._refresh_local)
@@ -281,20 +282,34 @@ class P2PView(ttk.Frame):
                 self.logger.error(f"Erreur foreign chunks: {e}")
             self.foreign_chunks_var.set(f"Chunks étrangers hébergés: {foreign_count}")
             
-            # Nombre de peers (si connexion active)
+            # Nombre de peers (si connexion active), requête hors du thread Tk
+            # Une seule requête à la fois: un tracker lent ne doit pas empiler les appels
             if self.app_gui.conn:
-                try:
-                    resp = self.app_gui.conn.get_peers()
-                    peers = resp.get('peers', []) if isinstance(resp, dict) else []
-                    self.peers_count_var.set(f"Peers: {len(peers)}")
-                except:
-                    self.peers_count_var.set("Peers: ?")
+                if not self._peers_inflight:
+                    try:
+                        fut = self.app_gui._exec.submit(self.app_gui.conn.get_peers)
+                        self._peers_inflight = True
+                        fut.add_done_callback(
+                            lambda f: self.after(0, self._apply_peers_count, f)
+                        )
+                    except Exception:
+                        self.peers_count_var.set("Peers: ?")
             else:
                 self.peers_count_var.set("Peers: Non connecté")
                 
         except Exception as e:
             self._log(f"Erreur stats: {e}")
     
+    def _apply_peers_count(self, fut):
+        """Affiche le nombre de peers une fois la requête get_peers terminée."""
+        self._peers_inflight = False
+        try:
+            resp = fut.result()
+            peers = resp.get('peers', []) if isinstance(resp, dict) else []
+            self.peers_count_var.set(f"Peers: {len(peers)}")
+        except Exception:
+            self.peers_count_var.set("Peers: ?")
+    
     def _chunk_file(self):
         """Ouvre un fichier et le découpe en chunks."""
         mgr = self._get_chunking_mgr()
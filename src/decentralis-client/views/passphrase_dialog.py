@@ -0,0 +1,81 @@
+import tkinter as tk
+from tkinter import ttk
+
+
+class PassphraseDialog(tk.Toplevel):
+    """
+    Demande de passphrase avec vérification et nouvel essai dans la même fenêtre.
+
+    La fenêtre reste ouverte tant que la passphrase est refusée: l'erreur est
+    affichée sous le champ, qui est vidé. Elle se ferme sur succès, sur
+    annulation ou après max_attempts échecs.
+
+    Après wait_window(), result vaut (passphrase, valeur retournée par
+    on_submit) en cas de succès, None sinon.
+    """
+
+    def __init__(self, parent, on_submit, title='Passphrase',
+                 prompt='Entrez la passphrase pour la clé de rétention:', max_attempts=3):
+        super().__init__(parent)
+        self.title(title)
+        self.resizable(False, False)
+        # Fenêtre parente pas encore affichée au démarrage: pas de transient
+        if parent.winfo_viewable():
+            self.transient(parent)
+
+        self.result = None
+        self._on_submit = on_submit
+        self._attempts_left = max_attempts
+
+        body = ttk.Frame(self, padding=10)
+        body.pack(fill='both', expand=True)
+        ttk.Label(body, text=prompt).pack(anchor='w')
+        self._pass_var = tk.StringVar()
+        self._entry = ttk.Entry(body, textvariable=self._pass_var, show='*', width=40)
+        self._entry.pack(fill='x', pady=(4, 0))
+        self._error_var = tk.StringVar()
+        ttk.Label(body, textvariable=self._error_var, foreground='red').pack(anchor='w', pady=(4, 0))
+
+        buttons = ttk.Frame(body)
+        buttons.pack(anchor='e', pady=(6, 0))
+        self._ok_btn = ttk.Button(buttons, text='OK', command=self._submit)
+        self._ok_btn.pack(side='left', padx=(0, 4))
+        ttk.Button(buttons, text='Annuler', command=self._cancel).pack(side='left')
+
+        self.bind('<Return>', lambda e: self._submit())
+        self.bind('<Escape>', lambda e: self._cancel())
+        self.protocol('WM_DELETE_WINDOW', self._cancel)
+
+        self._entry.focus_set()
+        self.wait_visibility()
+        self.grab_set()
+
+    def _submit(self):
+        passphrase = self._pass_var.get()
+        if not passphrase:
+            return
+        # Dérivation de clé (PBKDF2): signaler l'attente
+        self._ok_btn.state(['disabled'])
+        self.configure(cursor='watch')
+        self.update_idletasks()
+        try:
+            value = self._on_submit(passphrase)
+        except Exception as e:
+            self._attempts_left -= 1
+            if self._attempts_left <= 0:
+                self.destroy()
+                return
+            self._error_var.set(f'Passphrase incorrecte: {e}')
+            self._pass_var.set('')
+            self._entry.focus_set()
+            return
+        finally:
+            if self.winfo_exists():
+                self._ok_btn.state(['!disabled'])
+                self.configure(cursor='')
+        self.result = (passphrase, value)
+        self.destroy()
+
+    def _cancel(self):
+        self.result = None
+        self.destroy()
@@ -1,3 +1,4 @@
+import difflib
 import tkinter as tk
 from tkinter import ttk
 
@@ -6,16 +7,54 @@ class PeersView(ttk.Frame):
     def __init__(self, parent, app_gui, **kwargs):
         super().__init__(parent, **kwargs)
         self.app_gui = app_gui
-        ttk.Label(self, text="Pairs connus:").pack(anchor='w')
+        header = ttk.Frame(self)
+        header.pack(fill='x')
+        ttk.Label(header, text="Pairs connus:").pack(side='left')
+        ttk.Button(header, text="Rafraîchir", command=self.refresh).pack(side='right')
         self.listbox = tk.Listbox(self, height=12)
         self.listbox.pack(fill='both', expand=True)
+        # Lignes actuellement affichées, pour ne redessiner qu'en cas de changement
+        self._last_peers_key = ()
 
     def update_peers(self, peers):
+        """Affiche la liste des pairs. Retourne True si l'affichage a changé."""
+        lines = tuple(
+            f"{p.get('ip')}:{p.get('port')}" if isinstance(p, dict) else str(p)
+            for p in peers
+        )
+        if lines == self._last_peers_key:
+            return False
+        old = self._last_peers_key
+        self._last_peers_key = lines
+
+        if old and lines:
+            # Peu de changements: n'appliquer que les suppressions/insertions
+            # nécessaires, en partant de la fin pour garder les index valides
+            ops = [op for op in difflib.SequenceMatcher(None, old, lines, autojunk=False).get_opcodes()
+                   if op[0] != 'equal']
+            touched = sum(max(i2 - i1, j2 - j1) for _, i1, i2, j1, j2 in ops)
+            if touched <= len(lines) // 2:
+                for _, i1, i2, j1, j2 in reversed(ops):
+                    if i2 > i1:
+                        self.listbox.delete(i1, i2 - 1)
+                    if j2 > j1:
+                        self.listbox.insert(i1, *lines[j1:j2])
+                return True
+
+        self.listbox.delete(0, tk.END)
+        if lines:
+            # Un seul appel Tcl pour toutes les lignes
+            self.listbox.insert(tk.END, *lines)
+        return True
+
+    def refresh(self):
+        """Demande une annonce immédiate; la liste arrive via peer_queue."""
+        conn = getattr(self.app_gui, 'conn', None)
+        if conn is not None and hasattr(conn, 'announce_now'):
+            conn.announce_now()
+            if hasattr(self.app_gui, 'reset_peers_poll'):
+                self.app_gui.reset_peers_poll()
+
+    def clear(self):
+        self._last_peers_key = ()
         self.listbox.delete(0, tk.END)
-        for p in peers:
-            if isinstance(p, dict):
-                ip = p.get('ip')
-                port = p.get('port')
-                self.listbox.insert(tk.END, f"{ip}:{port}")
-            else:
-                self.listbox.insert(tk.END, str(p))